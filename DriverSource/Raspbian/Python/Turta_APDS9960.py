@@ -2,14 +2,17 @@
 # Distributed under the terms of the MIT license.
 
 # Python Driver for Broadcom / Avago APDS-9960 Ambient Light, Color, Proximity & Gesture Sensor
-# Version 1.01
-# Updated: July 14th, 2018
+# Version 1.02
+# Updated: October 18th, 2026
 
 # Visit https://docs.turta.io for documentation.
 
 import time
+import threading
+from collections import namedtuple
 from enum import IntEnum
-from smbus import SMBus
+import RPi.GPIO as GPIO
+from . import Turta_I2CBus
 
 #Enumerations
 
@@ -109,9 +112,39 @@ class GCONF4_GMODE(IntEnum):
     ALS_PROX_COLOR = 0b00000000
     GESTURE = 0b00000001
 
+#Gesture Directions
+class GESTURE_DIRECTION(IntEnum):
+    NONE = 0
+    UP = 1
+    DOWN = 2
+    LEFT = 3
+    RIGHT = 4
+    NEAR = 5
+    FAR = 6
+
+#Snapshots
+
+APDS9960Snapshot = namedtuple("APDS9960Snapshot", [ "clear", "red", "green", "blue", "proximity", "als_valid", "proximity_valid" ])
+
+#Normalized Readings
+
+NormalizedLight = namedtuple("NormalizedLight", [ "clear", "red", "green", "blue", "gain", "integration_time" ])
+
+#Gesture Events
+
+GestureEvent = namedtuple("GestureEvent", [ "timestamp", "direction" ])
+
+#Interrupt Events
+
+InterruptEvent = namedtuple("InterruptEvent", [ "timestamp", "als", "proximity", "snapshot" ])
+
 class APDS9960Sensor:
     """APDS-9960 Sensor"""
 
+    #Pins
+    #INT pin in BCM numbering, as in DriverSource/Windows10IoTCore/TurtaIoTHAT/TurtaIoTHAT/APDS9960Sensor.cs.
+    apds9960Int = 4
+
     #I2C Slave Address
     I2C_ADDRESS = 0x39
 
@@ -166,8 +199,52 @@ class APDS9960Sensor:
     APDS9960_GFIFO_L = 0xFE
     APDS9960_GFIFO_R = 0xFF
 
-    #I2C Config
-    bus = SMBus(1)
+    #Status Bits
+    STATUS_AVALID = 0b00000001
+    STATUS_PVALID = 0b00000010
+    STATUS_AINT = 0b00010000
+    STATUS_PINT = 0b00100000
+    GSTATUS_GFOV = 0b00000010
+
+    #Data: Enable register without and with interrupt enable bits
+    _enable = 0
+    _interrupt_enable = 0
+    _interrupt_callback = None
+
+    #Readout Block
+    APDS9960_DATA_LENGTH = 9 #CDATAL to PDATA
+
+    #Data: ALS gain and integration time in use
+    als_gain = CONTROL_AGAIN.X04
+    als_atime = 0xB6
+
+    #Data: ALS gain multipliers
+    const_again_factors = { CONTROL_AGAIN.X01: 1, CONTROL_AGAIN.X04: 4, CONTROL_AGAIN.X16: 16, CONTROL_AGAIN.X64: 64 }
+
+    #Data: ALS auto range steps from the least to the most sensitive, as gain and ATIME.
+    #Gain is raised before the integration time, so the shortest usable integration time is used.
+    const_als_auto_ranges = [
+        (CONTROL_AGAIN.X01, 0xFF), #2.78ms
+        (CONTROL_AGAIN.X01, 0xFC), #11.1ms
+        (CONTROL_AGAIN.X01, 0xF6), #27.8ms
+        (CONTROL_AGAIN.X04, 0xF6),
+        (CONTROL_AGAIN.X16, 0xF6),
+        (CONTROL_AGAIN.X64, 0xF6),
+        (CONTROL_AGAIN.X64, 0xDC), #100ms
+        (CONTROL_AGAIN.X64, 0xB6), #200ms
+        (CONTROL_AGAIN.X64, 0x00) ] #712ms
+
+    #ALS Auto Range Limits
+    als_saturation_level = 0.9 #Share of the max count where the range steps down.
+    als_min_counts = 100 #Clear channel count where the range steps up.
+
+    #Gesture FIFO
+    GESTURE_DATASETS_PER_READ = 8 #4 bytes per dataset, 32 bytes per SMBus block read.
+
+    #Gesture Decoding
+    gesture_threshold = 10 #Minimum count of all photodiodes for a dataset to be decoded.
+    gesture_sensitivity = 50 #Minimum change of the up-down or left-right ratio in percent for a direction.
+    gesture_near_far_ratio = 2.0 #Minimum change of the total count for near and far gestures.
 
     #I2C Communication
 
@@ -198,8 +275,14 @@ class APDS9960Sensor:
         """
         return self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 8)
 
-    def __init__(self):
-        """Initiates the APDS-9960 sensor to get ambient light, RGB light and proximity"""
+    def __init__(self, bus_number = Turta_I2CBus.DEFAULT_BUS_NUMBER, interrupt_pin = apds9960Int):
+        """Initiates the APDS-9960 sensor to get ambient light, RGB light and proximity
+        :param bus_number: I2C bus number.
+        :param interrupt_pin: GPIO pin of the sensor's INT output in BCM numbering.
+        """
+        self.bus = Turta_I2CBus.get_bus(bus_number)
+        self.apds9960Int = interrupt_pin
+        self._interrupt_lock = threading.Lock()
         self._set_initial_settings()
         self.set_mode(True, True, False)
         time.sleep(0.5)
@@ -318,7 +401,193 @@ class APDS9960Sensor:
         #Enable Wait
         enableCommand |= ENABLE_WEN.ON
 
-        self._write_register(self.APDS9960_ENABLE, enableCommand)
+        #Keep the interrupts enabled with set_interrupts.
+        self._enable = enableCommand
+        self._write_register(self.APDS9960_ENABLE, enableCommand | self._interrupt_enable)
+
+    def set_als_thresholds(self, low, high):
+        """Sets the ALS interrupt window. The interrupt fires when the clear channel is below the low or above the high threshold.
+        :param low: Low threshold of the clear channel, 0 to 65535.
+        :param high: High threshold of the clear channel, 0 to 65535.
+        """
+        #AILTL, AILTH, AIHTL and AIHTH are adjacent, write them at once.
+        self.bus.write_i2c_block_data(self.I2C_ADDRESS, self.APDS9960_AILTL, [ low & 0xFF, (low >> 8) & 0xFF, high & 0xFF, (high >> 8) & 0xFF ])
+
+    def set_proximity_thresholds(self, low, high):
+        """Sets the proximity interrupt window. The interrupt fires when proximity is below the low or above the high threshold.
+        :param low: Low threshold, 0 to 255.
+        :param high: High threshold, 0 to 255.
+        """
+        self._write_register(self.APDS9960_PILT, low)
+        self._write_register(self.APDS9960_PIHT, high)
+
+    def set_interrupt_persistence(self, als_persistence, proximity_persistence):
+        """Sets the number of consecutive out of window readings required to fire an interrupt.
+        :param als_persistence: ALS persistence value, 0 to 15. 0 for every cycle, 1 to 3 for that many cycles, then 5 cycles per step up to 60.
+        :param proximity_persistence: Proximity persistence, 0 to 15 cycles. 0 for every cycle.
+        """
+        self._write_register(self.APDS9960_PERS, ((proximity_persistence & 0x0F) << 4) | (als_persistence & 0x0F))
+
+    def set_interrupts(self, als_interrupt_enabled, proximity_interrupt_enabled):
+        """Toggles the ALS and proximity threshold interrupts on the INT pin.
+        :param als_interrupt_enabled: ALS interrupt.
+        :param proximity_interrupt_enabled: Proximity interrupt.
+        """
+        self._interrupt_enable = (ENABLE_AIEN.ON if als_interrupt_enabled else ENABLE_AIEN.OFF) | \
+            (ENABLE_PIEN.ON if proximity_interrupt_enabled else ENABLE_PIEN.OFF)
+
+        self.clear_interrupts()
+        self._write_register(self.APDS9960_ENABLE, self._enable | self._interrupt_enable)
+
+    def clear_interrupts(self, als = True, proximity = True):
+        """Clears the interrupts, which releases the INT pin.
+        :param als: Clear the ALS interrupt.
+        :param proximity: Clear the proximity interrupt.
+        """
+        if als and proximity:
+            self.bus.write_byte(self.I2C_ADDRESS, self.APDS9960_AICLEAR)
+        elif als:
+            self.bus.write_byte(self.I2C_ADDRESS, self.APDS9960_CICLEAR)
+        elif proximity:
+            self.bus.write_byte(self.I2C_ADDRESS, self.APDS9960_PICLEAR)
+
+    def set_als_range(self, gain, atime):
+        """Sets the ALS and color gain and integration time, then restarts the ALS cycle so the next reading uses them.
+        :param gain: ALS and color gain.
+        :param atime: ATIME register value. Integration time is 2.78ms x (256 - ATIME).
+        """
+        with self.bus:
+            control = self._read_register_1ubyte(self.APDS9960_CONTROL)
+            self._write_register(self.APDS9960_CONTROL, (control & 0b11111100) | gain)
+            self._write_register(self.APDS9960_ATIME, atime)
+
+            #Toggle AEN to drop the cycle in progress.
+            if self._enable & ENABLE_AEN.ON:
+                self._write_register(self.APDS9960_ENABLE, (self._enable & ~ENABLE_AEN.ON) | self._interrupt_enable)
+                self._write_register(self.APDS9960_ENABLE, self._enable | self._interrupt_enable)
+
+        self.als_gain = CONTROL_AGAIN(gain)
+        self.als_atime = atime
+
+    def get_als_integration_time(self, atime = None):
+        """Returns the ALS integration time in ms.
+        :param atime: ATIME register value. None for the value in use.
+        """
+        return 2.78 * (256 - (self.als_atime if atime is None else atime))
+
+    def get_als_max_count(self, atime = None):
+        """Returns the max count of the ALS and color channels.
+        :param atime: ATIME register value. None for the value in use.
+        """
+        return min(65535, 1025 * (256 - (self.als_atime if atime is None else atime)))
+
+    def _wait_for_als(self):
+        """Waits until an ALS cycle completes after a range change. Raises TimeoutError if it does not complete in twice the cycle time."""
+        #The cycle also includes the wait time, 20ms by default.
+        timeout = time.monotonic() + (2.0 * self.get_als_integration_time() + 50.0) / 1000.0
+        time.sleep(self.get_als_integration_time() / 1000.0)
+
+        while (self._read_register_1ubyte(self.APDS9960_STATUS) & self.STATUS_AVALID) != self.STATUS_AVALID:
+            if time.monotonic() > timeout:
+                raise TimeoutError("APDS-9960 ALS cycle did not complete. Check the sensor connection.")
+            time.sleep(0.002)
+
+    def _select_als_range(self, clear):
+        """Returns the auto range step for a clear channel count, or None to keep the range in use.
+        :param clear: Clear channel count with the range in use.
+        """
+        sensitivity = self.const_again_factors[self.als_gain] * (256 - self.als_atime)
+        steps = [ (self.const_again_factors[gain] * (256 - atime), gain, atime) for gain, atime in self.const_als_auto_ranges ]
+
+        #Saturated, step to the next less sensitive range.
+        if clear >= self.als_saturation_level * self.get_als_max_count():
+            lower = [ step for step in steps if step[0] < sensitivity ]
+            return lower[-1][1:] if lower else None
+
+        #Too few counts, step to the next more sensitive range unless the expected count saturates it.
+        if clear < self.als_min_counts:
+            higher = [ step for step in steps if step[0] > sensitivity ]
+            if higher:
+                expected = clear * higher[0][0] / sensitivity
+                if expected < self.als_saturation_level * self.get_als_max_count(higher[0][2]):
+                    return higher[0][1:]
+
+        return None
+
+    #Interrupts
+
+    def _setup_interrupt_pin(self):
+        """Configures the INT pin. It is open drain and active low."""
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(self.apds9960Int, GPIO.IN, pull_up_down = GPIO.PUD_UP)
+
+    def _handle_interrupt(self):
+        """Reads the interrupt sources and the readouts, then clears the interrupts."""
+        timestamp = time.monotonic_ns()
+
+        with self.bus:
+            data = self.bus.read_i2c_block_data(self.I2C_ADDRESS, self.APDS9960_STATUS, self.APDS9960_DATA_LENGTH + 1)
+            self.clear_interrupts()
+
+        return InterruptEvent(timestamp,
+            (data[0] & self.STATUS_AINT) == self.STATUS_AINT,
+            (data[0] & self.STATUS_PINT) == self.STATUS_PINT,
+            self._decode_snapshot(data))
+
+    def wait_for_interrupt(self, timeout = None):
+        """Blocks until the INT pin is asserted, then returns the interrupt event. Returns None on timeout.
+        Enable the interrupts with set_interrupts first. Can not be used while an interrupt callback is running.
+        :param timeout: Maximum wait in seconds. None to wait forever.
+        """
+        if self._interrupt_callback is not None:
+            raise RuntimeError("Interrupt callback is running. Stop it with stop_interrupt_callback before waiting for interrupts.")
+
+        self._setup_interrupt_pin()
+
+        #An interrupt that is already pending does not make a new edge.
+        if GPIO.input(self.apds9960Int):
+            if timeout is None:
+                channel = GPIO.wait_for_edge(self.apds9960Int, GPIO.FALLING)
+            else:
+                channel = GPIO.wait_for_edge(self.apds9960Int, GPIO.FALLING, timeout = max(1, int(timeout * 1000)))
+
+            if channel is None:
+                return None
+
+        return self._handle_interrupt()
+
+    def start_interrupt_callback(self, callback):
+        """Calls a function with the interrupt event each time the INT pin is asserted.
+        Enable the interrupts with set_interrupts first. The function runs on the GPIO event thread.
+        :param callback: Function to call with the interrupt event.
+        """
+        self.stop_interrupt_callback()
+        self._setup_interrupt_pin()
+        self._interrupt_callback = callback
+        GPIO.add_event_detect(self.apds9960Int, GPIO.FALLING, callback = lambda channel: self._dispatch_interrupt(callback))
+
+        #Release an interrupt that fired before the callback was set, so the next one makes an edge.
+        self._dispatch_interrupt(callback)
+
+    def _dispatch_interrupt(self, callback):
+        """Handles a pending interrupt and calls the function with its event. Does nothing if the INT pin is released.
+        :param callback: Function to call with the interrupt event.
+        """
+        #Check the level under the lock, so an edge right after the callback is set is not handled twice.
+        with self._interrupt_lock:
+            if GPIO.input(self.apds9960Int):
+                return
+
+            callback(self._handle_interrupt())
+
+    def stop_interrupt_callback(self):
+        """Stops calling the interrupt callback."""
+        if self._interrupt_callback is None:
+            return
+
+        GPIO.remove_event_detect(self.apds9960Int)
+        self._interrupt_callback = None
 
     #Sensor Readouts
 
@@ -343,8 +612,176 @@ class APDS9960Sensor:
         """Reads the proximity value."""
         return int(self._read_register_1ubyte(self.APDS9960_PDATA))
 
+    def read_snapshot(self, check_status = False):
+        """Reads the clear, red, green, blue and proximity values in one transaction, so all values are from the same cycle.
+        Validity fields are None if the status is not checked.
+        :param check_status: True to also read the STATUS register in the same transaction and report the AVALID and PVALID bits.
+        """
+        if check_status:
+            return self._decode_snapshot(self.bus.read_i2c_block_data(self.I2C_ADDRESS, self.APDS9960_STATUS, self.APDS9960_DATA_LENGTH + 1))
+        else:
+            return self._decode_snapshot([ None ] + self.bus.read_i2c_block_data(self.I2C_ADDRESS, self.APDS9960_CDATAL, self.APDS9960_DATA_LENGTH))
+
+    def read_normalized_light(self, auto_range = True):
+        """Reads the clear, red, green and blue values normalized to counts per ms at 1x gain, so they do not depend on the range.
+        :param auto_range: True to step the gain and integration time until the clear channel is in range.
+        """
+        snapshot = self.read_snapshot()
+
+        #One step per ALS cycle, at most through all steps.
+        if auto_range:
+            for i in range(len(self.const_als_auto_ranges)):
+                step = self._select_als_range(snapshot.clear)
+                if step is None:
+                    break
+
+                self.set_als_range(*step)
+                self._wait_for_als()
+                snapshot = self.read_snapshot()
+
+        integrationTime = self.get_als_integration_time()
+        scale = 1.0 / (self.const_again_factors[self.als_gain] * integrationTime)
+
+        return NormalizedLight(
+            snapshot.clear * scale,
+            snapshot.red * scale,
+            snapshot.green * scale,
+            snapshot.blue * scale,
+            self.als_gain,
+            integrationTime)
+
+    def _decode_snapshot(self, data):
+        """Decodes the STATUS to PDATA registers.
+        :param data: STATUS to PDATA register values. STATUS is None if not read.
+        """
+        status = data[0]
+        if status is None:
+            alsValid = None
+            proximityValid = None
+        else:
+            alsValid = (status & self.STATUS_AVALID) == self.STATUS_AVALID
+            proximityValid = (status & self.STATUS_PVALID) == self.STATUS_PVALID
+        data = data[1:]
+
+        return APDS9960Snapshot(
+            data[0] | (data[1] << 8), #Clear channel
+            data[2] | (data[3] << 8), #Red channel
+            data[4] | (data[5] << 8), #Green channel
+            data[6] | (data[7] << 8), #Blue channel
+            data[8], #Proximity
+            alsValid,
+            proximityValid)
+
+    #Gesture Recognition
+
+    def _read_gesture_fifo(self):
+        """Drains the gesture FIFO with block reads.
+        Returns the FIFO level before draining, the up, down, left and right datasets and the overflow state respectively.
+        On overflow, the FIFO is cleared and no datasets are returned."""
+        datasets = []
+
+        with self.bus:
+            #GFLVL and GSTATUS are adjacent, read both at once.
+            level, status = self.bus.read_i2c_block_data(self.I2C_ADDRESS, self.APDS9960_GFLVL, 2)
+
+            if (status & self.GSTATUS_GFOV) == self.GSTATUS_GFOV:
+                #Datasets were lost, so the rest of the FIFO can not be decoded.
+                self._write_register(self.APDS9960_GCONF4, self._read_register_1ubyte(self.APDS9960_GCONF4) | GCONF4_GFIFO_CLR.ON)
+                return level, datasets, True
+
+            remaining = level
+
+            while remaining > 0:
+                count = min(remaining, self.GESTURE_DATASETS_PER_READ)
+
+                #The FIFO address wraps from GFIFO_R back to GFIFO_U, so a block read returns consecutive datasets.
+                fifo = self.bus.read_i2c_block_data(self.I2C_ADDRESS, self.APDS9960_GFIFO_U, count * 4)
+                for i in range(0, count * 4, 4):
+                    datasets.append((fifo[i], fifo[i + 1], fifo[i + 2], fifo[i + 3]))
+                remaining -= count
+
+        return level, datasets, False
+
+    def _is_gesture_active(self):
+        """Returns True if the gesture engine is collecting datasets."""
+        return (self._read_register_1ubyte(self.APDS9960_GCONF4) & GCONF4_GMODE.GESTURE) == GCONF4_GMODE.GESTURE
+
+    def _decode_gesture(self, datasets):
+        """Decodes the gesture direction from the datasets of one gesture.
+        :param datasets: Up, down, left and right datasets.
+        """
+        datasets = [ d for d in datasets if min(d) > self.gesture_threshold ]
+        if len(datasets) < 2:
+            return GESTURE_DIRECTION.NONE
+
+        first, last = datasets[0], datasets[-1]
+
+        #Change of the up-down and left-right ratios from the first to the last dataset.
+        udDelta = ((last[0] - last[1]) * 100) // (last[0] + last[1]) - ((first[0] - first[1]) * 100) // (first[0] + first[1])
+        lrDelta = ((last[2] - last[3]) * 100) // (last[2] + last[3]) - ((first[2] - first[3]) * 100) // (first[2] + first[3])
+
+        if max(abs(udDelta), abs(lrDelta)) >= self.gesture_sensitivity:
+            if abs(udDelta) >= abs(lrDelta):
+                return GESTURE_DIRECTION.UP if udDelta < 0 else GESTURE_DIRECTION.DOWN
+            else:
+                return GESTURE_DIRECTION.LEFT if lrDelta < 0 else GESTURE_DIRECTION.RIGHT
+
+        #No sideways movement, check if the object approached or moved away.
+        firstTotal, lastTotal = sum(first), sum(last)
+        if lastTotal >= firstTotal * self.gesture_near_far_ratio:
+            return GESTURE_DIRECTION.NEAR
+        elif firstTotal >= lastTotal * self.gesture_near_far_ratio:
+            return GESTURE_DIRECTION.FAR
+
+        return GESTURE_DIRECTION.NONE
+
+    def read_gesture(self, timeout = None, interval = 0.01):
+        """Waits for a gesture and returns its direction. Returns NONE on timeout.
+        Enable proximity detection and gesture recognition with set_mode first.
+        :param timeout: Maximum wait in seconds. None to wait until a gesture is recognized.
+        :param interval: FIFO check interval in seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        datasets = []
+        discard = False
+
+        while True:
+            level, data, overflow = self._read_gesture_fifo()
+
+            #After an overflow, drop the datasets of the gesture until it is over.
+            if overflow:
+                discard = True
+                datasets = []
+            elif not discard:
+                datasets += data
+
+            #The gesture is over when the engine exits and the FIFO is empty.
+            if level == 0 and (datasets or discard) and not self._is_gesture_active():
+                discard = False
+                direction = self._decode_gesture(datasets)
+                if direction != GESTURE_DIRECTION.NONE:
+                    return direction
+                datasets = []
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return GESTURE_DIRECTION.NONE
+
+            time.sleep(interval)
+
+    def read_gestures(self, interval = 0.01):
+        """Yields gesture events as gestures are recognized.
+        Enable proximity detection and gesture recognition with set_mode first.
+        :param interval: FIFO check interval in seconds.
+        """
+        while True:
+            direction = self.read_gesture(None, interval)
+            yield GestureEvent(time.monotonic_ns(), direction)
+
     #Disposal
     def __del__(self):
         """Releases the resources."""
+        self.stop_interrupt_callback()
+
         #Turn off the sensor functionality.
+        self._interrupt_enable = 0
         self.set_mode(False, False, False)
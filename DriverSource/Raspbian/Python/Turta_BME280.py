@@ -2,15 +2,18 @@
 # Distributed under the terms of the MIT license.
 
 # Python Driver for Bosch Sensortec BME280 Environmental Sensor
-# Version 1.01
-# Updated: July 14th, 2018
+# Version 1.02
+# Updated: October 18th, 2026
 
 # Visit https://docs.turta.io for documentation.
 
 import time
 import math
+import struct
+from collections import namedtuple
 from enum import IntEnum
-from smbus import SMBus
+from . import Turta_I2CBus
+from . import Turta_CalibrationCache
 
 #Enumerations
 
@@ -60,6 +63,17 @@ class FilterCoefficient(IntEnum):
     fc08 = 0b00001100
     fc16 = 0b00010000
 
+class CompensationMode(IntEnum):
+    Float = 0 #Floating point formulas.
+    Integer = 1 #Fixed point formulas. 32-bit for temperature and humidity, 64-bit for pressure.
+
+#Calibration Data
+
+BME280Calibration = namedtuple("BME280Calibration", [
+    "T1", "T2", "T3",
+    "P1", "P2", "P3", "P4", "P5", "P6", "P7", "P8", "P9",
+    "H1", "H2", "H3", "H4", "H5", "H6" ])
+
 class BME280Sensor:
     """BME280 Sensor"""
 
@@ -84,50 +98,42 @@ class BME280Sensor:
     BME280_TEMP_XLSB = 0xFC
     BME280_HUM_MSB = 0xFD
     BME280_HUM_LSB = 0xFE
+    BME280_DATA_LENGTH = 8 #0xF7 to 0xFE
 
-    #Registers: Calibration
-    BME280_DIG_T1 = 0x88
-    BME280_DIG_T2 = 0x8A
-    BME280_DIG_T3 = 0x8C
-    BME280_DIG_P1 = 0x8E
-    BME280_DIG_P2 = 0x90
-    BME280_DIG_P3 = 0x92
-    BME280_DIG_P4 = 0x94
-    BME280_DIG_P5 = 0x96
-    BME280_DIG_P6 = 0x98
-    BME280_DIG_P7 = 0x9A
-    BME280_DIG_P8 = 0x9C
-    BME280_DIG_P9 = 0x9E
-    BME280_DIG_H1 = 0xA1
-    BME280_DIG_H2 = 0xE1
-    BME280_DIG_H3 = 0xE3
-    BME280_DIG_H4 = 0xE4
-    BME280_DIG_H5 = 0xE5
-    BME280_DIG_H6 = 0xE7
+    #Registers: Calibration Blocks
+    BME280_COEFF_1 = 0x88
+    BME280_COEFF_1_LENGTH = 26 #0x88 to 0xA1
+    BME280_COEFF_2 = 0xE1
+    BME280_COEFF_2_LENGTH = 7 #0xE1 to 0xE7
+    BME280_CALIBRATION_LENGTH = 33
+    BME280_CALIBRATION_CHECK_LENGTH = 8 #T1, T2, T3 and P1 registers identify the chip.
 
     #Data: Calibration
-    calDig_T1 = None
-    calDig_T2 = None
-    calDig_T3 = None
-    calDig_P1 = None
-    calDig_P2 = None
-    calDig_P3 = None
-    calDig_P4 = None
-    calDig_P5 = None
-    calDig_P6 = None
-    calDig_P7 = None
-    calDig_P8 = None
-    calDig_P9 = None
-    calDig_H1 = None
-    calDig_H2 = None
-    calDig_H3 = None
-    calDig_H4 = None
-    calDig_H5 = None
-    calDig_H6 = None
+    calibration = None
     fineTemperature = 0
-
-    #I2C Config
-    bus = SMBus(1)
+    compensation_mode = CompensationMode.Float
+
+    #Data: Measurement cycles for oversampling settings
+    const_meas_cycles = [ 0, 1, 2, 4, 8, 16 ]
+
+    #Data: Inactive durations in ms
+    const_inactive_durations = {
+        InactiveDuration.ms0000_5: 0.5,
+        InactiveDuration.ms0010: 10.0,
+        InactiveDuration.ms0020: 20.0,
+        InactiveDuration.ms0062_5: 62.5,
+        InactiveDuration.ms0125: 125.0,
+        InactiveDuration.ms0250: 250.0,
+        InactiveDuration.ms0500: 500.0,
+        InactiveDuration.ms1000: 1000.0 }
+
+    #Data: Samples for the IIR filter to reach 75% of a step response
+    const_filter_settle_samples = {
+        FilterCoefficient.FilterOff: 1,
+        FilterCoefficient.fc02: 2,
+        FilterCoefficient.fc04: 5,
+        FilterCoefficient.fc08: 11,
+        FilterCoefficient.fc16: 22 }
 
     #I2C Communication
 
@@ -145,33 +151,6 @@ class BME280Sensor:
         buffer = self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 1)
         return buffer[0]
 
-    def _read_register_1sbyte(self, reg_addr):
-        """Reads data from the I2C device.
-        :param reg_addr: Read register address.
-        """
-        buffer = self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 1)
-        val = buffer[0]
-        if val & (1 << 7) != 0:
-            val = val - (1 << 7)
-        return val
-
-    def _read_2bytes_as_ushort_lsbfirst(self, reg_addr):
-        """Reads data from the I2C device.
-        :param reg_addr: Read register address.
-        """
-        buffer = self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 2)
-        return buffer[0] + (buffer[1] << 8)
-
-    def _read_2bytes_as_short_lsbfirst(self, reg_addr):
-        """Reads data from the I2C device.
-        :param reg_addr: Read register address.
-        """
-        buffer = self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 2)
-        val = buffer[0] + (buffer[1] << 8)
-        if val & (1 << 15) != 0:
-            val = val - (1 << 15)
-        return val
-
     def _read_multiple_bytes_as_array(self, reg_addr, lenght):
         """Reads data from the I2C device.
         :param reg_addr: Read register address.
@@ -179,8 +158,17 @@ class BME280Sensor:
         """
         return self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, lenght)
 
-    def __init__(self):
-        """Initiates the BME680 sensor to get air quality level, temperature, humidity, pressure and altitude."""
+    def __init__(self, bus_number = Turta_I2CBus.DEFAULT_BUS_NUMBER, i2c_address = I2C_ADDRESS, calibration_cache = None, compensation_mode = CompensationMode.Float):
+        """Initiates the BME280 sensor to get temperature, humidity, pressure and altitude.
+        :param bus_number: I2C bus number.
+        :param i2c_address: I2C slave address. 0x77 on IoT HAT, 0x76 for a sensor with SDO pulled low.
+        :param calibration_cache: Calibration cache file path. None to read the calibration from the sensor every time.
+        :param compensation_mode: Compensation formulas. Integer mode is faster on boards without a floating point unit.
+        """
+        self.bus = Turta_I2CBus.get_bus(bus_number)
+        self.I2C_ADDRESS = i2c_address
+        self.calibration_cache = calibration_cache
+        self.compensation_mode = compensation_mode
         self._read_calibration_data()
         self.set_oversamplings_and_mode(
             HumidityOversampling.x08,
@@ -205,71 +193,78 @@ class BME280Sensor:
 
         self._write_register(self.BME280_CTRL_MEAS, temperature_oversampling | pressure_oversamling | mode)
 
+        self.humidity_oversampling = humidity_oversampling
+        self.temperature_oversampling = temperature_oversampling
+        self.pressure_oversampling = pressure_oversamling
+        self.mode = mode
+
     def set_config(self, inactive_duration, filter_coefficient):
         """Sets the sensor configuration.
         :param inactive_duration: Inactive duration between normal mode measurements.
         :param filter_coefficient: Filter coefficient."""
         self._write_register(self.BME280_CONFIG, inactive_duration | filter_coefficient)
 
+        self.inactive_duration = inactive_duration
+        self.filter_coefficient = filter_coefficient
+
     #Calibration and Compensation
 
     def _read_calibration_data(self):
-        """Reads the factory out calibration data from the sensor."""
-        #Declare global variables.
-        global calDig_T1
-        global calDig_T2
-        global calDig_T3
-        global calDig_P1
-        global calDig_P2
-        global calDig_P3
-        global calDig_P4
-        global calDig_P5
-        global calDig_P6
-        global calDig_P7
-        global calDig_P8
-        global calDig_P9
-        global calDig_H1
-        global calDig_H2
-        global calDig_H3
-        global calDig_H4
-        global calDig_H5
-        global calDig_H6
-
-        #Temperature calibration
-        calDig_T1 = self._read_2bytes_as_ushort_lsbfirst(self.BME280_DIG_T1)
-        calDig_T2 = self._read_2bytes_as_short_lsbfirst(self.BME280_DIG_T2)
-        calDig_T3 = self._read_2bytes_as_short_lsbfirst(self.BME280_DIG_T3)
-
-        #Pressure calibration
-        calDig_P1 = self._read_2bytes_as_ushort_lsbfirst(self.BME280_DIG_P1)
-        calDig_P2 = self._read_2bytes_as_short_lsbfirst(self.BME280_DIG_P2)
-        calDig_P3 = self._read_2bytes_as_short_lsbfirst(self.BME280_DIG_P3)
-        calDig_P4 = self._read_2bytes_as_short_lsbfirst(self.BME280_DIG_P4)
-        calDig_P5 = self._read_2bytes_as_short_lsbfirst(self.BME280_DIG_P5)
-        calDig_P6 = self._read_2bytes_as_short_lsbfirst(self.BME280_DIG_P6)
-        calDig_P7 = self._read_2bytes_as_short_lsbfirst(self.BME280_DIG_P7)
-        calDig_P8 = self._read_2bytes_as_short_lsbfirst(self.BME280_DIG_P8)
-        calDig_P9 = self._read_2bytes_as_short_lsbfirst(self.BME280_DIG_P9)
-
-        #Humidity calibration
-        calDig_H1 = self._read_register_1sbyte(self.BME280_DIG_H1)
-        calDig_H2 = self._read_2bytes_as_ushort_lsbfirst(self.BME280_DIG_H2)
-        calDig_H3 = self._read_register_1sbyte(self.BME280_DIG_H3)
-        calDig_H4 = (self._read_register_1sbyte(self.BME280_DIG_H4) << 4) | (self._read_register_1sbyte(self.BME280_DIG_H4 + 1) & 0xF)
-        calDig_H5 = self._read_register_1sbyte((self.BME280_DIG_H5 + 1) << 4) | (self._read_register_1sbyte(self.BME280_DIG_H5) >> 4)
-        calDig_H6 = self._read_register_1sbyte(self.BME280_DIG_H6)
+        """Reads the factory out calibration data from the sensor, or from the calibration cache if enabled."""
+        raw = None
+
+        if self.calibration_cache is not None:
+            key = Turta_CalibrationCache.make_key(self.bus.bus_number, self.I2C_ADDRESS, self._read_register_1ubyte(self.BME280_ID))
+            raw = Turta_CalibrationCache.load(self.calibration_cache, key)
+
+            #Discard the cached data if it does not belong to the connected chip.
+            if raw is not None and (len(raw) != self.BME280_CALIBRATION_LENGTH or \
+                self._read_multiple_bytes_as_array(self.BME280_COEFF_1, self.BME280_CALIBRATION_CHECK_LENGTH) != raw[:self.BME280_CALIBRATION_CHECK_LENGTH]):
+                raw = None
+
+        if raw is None:
+            raw = self._read_multiple_bytes_as_array(self.BME280_COEFF_1, self.BME280_COEFF_1_LENGTH)
+            raw += self._read_multiple_bytes_as_array(self.BME280_COEFF_2, self.BME280_COEFF_2_LENGTH)
+
+            if self.calibration_cache is not None:
+                try:
+                    Turta_CalibrationCache.store(self.calibration_cache, key, raw)
+                except (IOError, OSError):
+                    pass #The cache is optional, the sensor works without it.
+
+        self.calibration = self._parse_calibration_data(raw)
+
+    def _parse_calibration_data(self, raw):
+        """Decodes the calibration data blocks.
+        :param raw: Calibration blocks one and two respectively.
+        """
+        (calDig_T1, calDig_T2, calDig_T3, calDig_P1, calDig_P2, calDig_P3, calDig_P4, calDig_P5, calDig_P6, calDig_P7, calDig_P8, calDig_P9, calDig_H1) = \
+            struct.unpack_from("<HhhHhhhhhhhhxB", bytes(raw), 0)
+        (calDig_H2, calDig_H3, h4Msb, h4h5Lsb, h5Msb, calDig_H6) = \
+            struct.unpack_from("<hBbBbb", bytes(raw), self.BME280_COEFF_1_LENGTH)
+
+        #Humidity calibration shares the nibbles of register 0xE5.
+        calDig_H4 = (h4Msb << 4) | (h4h5Lsb & 0x0F)
+        calDig_H5 = (h5Msb << 4) | (h4h5Lsb >> 4)
+
+        return BME280Calibration(
+            calDig_T1, calDig_T2, calDig_T3,
+            calDig_P1, calDig_P2, calDig_P3, calDig_P4, calDig_P5, calDig_P6, calDig_P7, calDig_P8, calDig_P9,
+            calDig_H1, calDig_H2, calDig_H3, calDig_H4, calDig_H5, calDig_H6)
 
     def _compensate_temperature(self, temp_adc):
         """Compensates the temperature.
         :param temp_adc: Analog temperature value.
         """
-        #Declare global variable.
-        global fineTemperature
+        if self.compensation_mode == CompensationMode.Integer:
+            return self._compensate_temperature_int(temp_adc)
 
-        var1 = (temp_adc / 16384.0 - calDig_T1 / 1024.0) * calDig_T2
-        var2 = ((temp_adc / 131072.0 - calDig_T1 / 8192.0) * (temp_adc / 131072.0 - calDig_T1 / 8192.0)) * calDig_T3
-        fineTemperature = (var1 + var2)
-        val = fineTemperature / 5120.0
+        cal = self.calibration
+
+        var1 = (temp_adc / 16384.0 - cal.T1 / 1024.0) * cal.T2
+        var2 = ((temp_adc / 131072.0 - cal.T1 / 8192.0) * (temp_adc / 131072.0 - cal.T1 / 8192.0)) * cal.T3
+        self.fineTemperature = (var1 + var2)
+        val = self.fineTemperature / 5120.0
 
         return float(val)
 
@@ -277,21 +272,26 @@ class BME280Sensor:
         """Compensates the pressure.
         :param pres_adc: Analog pressure value.
         """
-        var1 = (fineTemperature / 2.0) - 64000.0
-        var2 = var1 * var1 * calDig_P6 / 32768.0
-        var2 = var2 + var1 * calDig_P5 * 2.0
-        var2 = (var2 / 4.0) + (calDig_P4 * 65536.0)
-        var1 = (calDig_P3 * var1 * var1 / 524288.0 + calDig_P2 * var1) / 524288.0
-        var1 = (1.0 + var1 / 32768.0) * calDig_P1
+        if self.compensation_mode == CompensationMode.Integer:
+            return self._compensate_pressure_int(pres_adc)
+
+        cal = self.calibration
+
+        var1 = (self.fineTemperature / 2.0) - 64000.0
+        var2 = var1 * var1 * cal.P6 / 32768.0
+        var2 = var2 + var1 * cal.P5 * 2.0
+        var2 = (var2 / 4.0) + (cal.P4 * 65536.0)
+        var1 = (cal.P3 * var1 * var1 / 524288.0 + cal.P2 * var1) / 524288.0
+        var1 = (1.0 + var1 / 32768.0) * cal.P1
 
         if var1 == 0.0:
             return 0
 
         val = 1048576.0 - pres_adc
         val = (val - (var2 / 4096.0)) * 6250.0 / var1
-        var1 = calDig_P9 * val * val / 2147483648.0
-        var2 = val * calDig_P8 / 32768.0
-        val = val + (var1 + var2 + calDig_P7) / 16.0
+        var1 = cal.P9 * val * val / 2147483648.0
+        var2 = val * cal.P8 / 32768.0
+        val = val + (var1 + var2 + cal.P7) / 16.0
 
         return float(val)
 
@@ -299,9 +299,14 @@ class BME280Sensor:
         """Compensates the humidity.
         :param hum_adc: Analog humidity value.
         """
-        val = fineTemperature - 76800.0
-        val = (hum_adc - (calDig_H4 * 64.0 + calDig_H5 / 16384.0 * val)) * (calDig_H2 / 65536.0 * (1.0 + calDig_H6 / 67108864.0 * val * (1.0 + calDig_H3 / 67108864.0 * val)))
-        val = val * (1.0 - calDig_H1 * val / 524288.0)
+        if self.compensation_mode == CompensationMode.Integer:
+            return self._compensate_humidity_int(hum_adc)
+
+        cal = self.calibration
+
+        val = self.fineTemperature - 76800.0
+        val = (hum_adc - (cal.H4 * 64.0 + cal.H5 / 16384.0 * val)) * (cal.H2 / 65536.0 * (1.0 + cal.H6 / 67108864.0 * val * (1.0 + cal.H3 / 67108864.0 * val)))
+        val = val * (1.0 - cal.H1 * val / 524288.0)
 
         if val > 100.0:
             val = 100.0
@@ -310,25 +315,111 @@ class BME280Sensor:
 
         return val
 
+    def _compensate_temperature_int(self, temp_adc):
+        """Compensates the temperature with 32-bit fixed point formulas.
+        :param temp_adc: Analog temperature value.
+        """
+        cal = self.calibration
+
+        var1 = (((temp_adc >> 3) - (cal.T1 << 1)) * cal.T2) >> 11
+        var2 = (((((temp_adc >> 4) - cal.T1) * ((temp_adc >> 4) - cal.T1)) >> 12) * cal.T3) >> 14
+        self.fineTemperature = var1 + var2
+        val = (self.fineTemperature * 5 + 128) >> 8 #0.01 degC resolution.
+
+        return val / 100.0
+
+    def _compensate_pressure_int(self, pres_adc):
+        """Compensates the pressure with 64-bit fixed point formulas.
+        :param pres_adc: Analog pressure value.
+        """
+        cal = self.calibration
+
+        var1 = self.fineTemperature - 128000
+        var2 = var1 * var1 * cal.P6
+        var2 = var2 + ((var1 * cal.P5) << 17)
+        var2 = var2 + (cal.P4 << 35)
+        var1 = ((var1 * var1 * cal.P3) >> 8) + ((var1 * cal.P2) << 12)
+        var1 = (((1 << 47) + var1) * cal.P1) >> 33
+
+        if var1 == 0:
+            return 0
+
+        val = 1048576 - pres_adc
+        val = self._divide_int((((val << 31) - var2) * 3125), var1)
+        var1 = (cal.P9 * (val >> 13) * (val >> 13)) >> 25
+        var2 = (cal.P8 * val) >> 19
+        val = ((val + var1 + var2) >> 8) + (cal.P7 << 4) #Q24.8 format.
+
+        return val / 256.0
+
+    def _compensate_humidity_int(self, hum_adc):
+        """Compensates the humidity with 32-bit fixed point formulas.
+        :param hum_adc: Analog humidity value.
+        """
+        cal = self.calibration
+
+        val = self.fineTemperature - 76800
+        val = ((((hum_adc << 14) - (cal.H4 << 20) - (cal.H5 * val)) + 16384) >> 15) * \
+            (((((((val * cal.H6) >> 10) * (((val * cal.H3) >> 11) + 32768)) >> 10) + 2097152) * cal.H2 + 8192) >> 14)
+        val = val - (((((val >> 15) * (val >> 15)) >> 7) * cal.H1) >> 4)
+
+        if val > 419430400:
+            val = 419430400
+        elif val < 0:
+            val = 0
+
+        return (val >> 12) / 1024.0 #Q22.10 format.
+
+    def _divide_int(self, dividend, divisor):
+        """Divides integers rounding toward zero, as the fixed point formulas expect.
+        :param dividend: Dividend.
+        :param divisor: Divisor.
+        """
+        quotient = abs(dividend) // abs(divisor)
+        return quotient if (dividend < 0) == (divisor < 0) else -quotient
+
     #Sensor Readouts
 
+    def _read_data(self):
+        """Reads the pressure, temperature and humidity data registers in one transaction.
+        Returns temperature, pressure and humidity ADC values respectively."""
+        data = self._read_multiple_bytes_as_array(self.BME280_PRESS_MSB, self.BME280_DATA_LENGTH)
+
+        return self._decode_data(data)
+
+    def _decode_data(self, data):
+        """Decodes the data registers.
+        :param data: Data registers from 0xF7 to 0xFE.
+        """
+        tempADC = (data[3] << 12) + (data[4] << 4) + (data[5] >> 4)
+        presADC = (data[0] << 12) + (data[1] << 4) + (data[2] >> 4)
+        humADC = (data[6] << 8) + data[7]
+
+        return tempADC, presADC, humADC
+
     def read_temperature(self):
         """Reads the temperature in Celcius."""
-        tRaw = self._read_multiple_bytes_as_array(self.BME280_TEMP_MSB, 3)
+        tempADC, presADC, humADC = self._read_data()
 
-        return float(self._compensate_temperature((tRaw[0] << 12) + (tRaw[1] << 4) + (tRaw[2] >> 4)))
+        return float(self._compensate_temperature(tempADC))
 
     def read_humidity(self):
         """Reads the relative humidity."""
-        hRaw = self._read_multiple_bytes_as_array(self.BME280_HUM_MSB, 2)
+        tempADC, presADC, humADC = self._read_data()
 
-        return float(self._compensate_humidity((hRaw[0] << 8) + hRaw[1]))
+        #Humidity compensation depends on the fine temperature of the same measurement.
+        self._compensate_temperature(tempADC)
+
+        return float(self._compensate_humidity(humADC))
 
     def read_pressure(self):
         """Reads the pressure in Pa."""
-        pRaw = self._read_multiple_bytes_as_array(self.BME280_PRESS_MSB, 3)
+        tempADC, presADC, humADC = self._read_data()
+
+        #Pressure compensation depends on the fine temperature of the same measurement.
+        self._compensate_temperature(tempADC)
 
-        return float(self._compensate_pressure((pRaw[0] << 12) + (pRaw[1] << 4) + (pRaw[2] >> 4)))
+        return float(self._compensate_pressure(presADC))
 
     def read_altitude(self, meanSeaLevelPressureInBar):
         """Reads the altitude from the sea level in meters.
@@ -340,18 +431,117 @@ class BME280Sensor:
 
     def read_tph(self):
         """Reads temperature, pressure and relative humidity."""
-        resultsTPH = [ 0.0, 0.0, 0.0 ]
+        tempADC, presADC, humADC = self._read_data()
 
-        tRaw = self._read_multiple_bytes_as_array(self.BME280_TEMP_MSB, 3)
-        pRaw = self._read_multiple_bytes_as_array(self.BME280_PRESS_MSB, 3)
-        hRaw = self._read_multiple_bytes_as_array(self.BME280_HUM_MSB, 2)
+        return self._compensate_tph(tempADC, presADC, humADC)
 
-        resultsTPH[0] = float(self._compensate_temperature((tRaw[0] << 12) + (tRaw[1] << 4) + (tRaw[2] >> 4)))
-        resultsTPH[1] = float(self._compensate_pressure((pRaw[0] << 12) + (pRaw[1] << 4) + (pRaw[2] >> 4)))
-        resultsTPH[2] = float(self._compensate_humidity(hRaw[0] << 8) + hRaw[1])
+    def _compensate_tph(self, tempADC, presADC, humADC):
+        """Compensates temperature, pressure and relative humidity of one measurement.
+        :param tempADC: Analog temperature value.
+        :param presADC: Analog pressure value.
+        :param humADC: Analog humidity value.
+        """
+        resultsTPH = [ 0.0, 0.0, 0.0 ]
+
+        resultsTPH[0] = float(self._compensate_temperature(tempADC))
+        resultsTPH[1] = float(self._compensate_pressure(presADC))
+        resultsTPH[2] = float(self._compensate_humidity(humADC))
 
         return resultsTPH
 
+    #Normal Mode Sampling
+
+    def sample_tph(self, count = None, settle = False):
+        """Yields temperature, pressure and relative humidity of each normal mode conversion once.
+        Reads are scheduled from the oversamplings and inactive duration, one transaction per sample.
+        Raw data that is identical to the last sample is confirmed by resynchronizing on the next conversion,
+        so no conversion is yielded twice. A conversion that repeats the last raw data exactly may be skipped.
+        :param count: Number of samples. None to sample until the generator is closed.
+        :param settle: Skip the conversions the IIR filter needs to settle after sampling starts.
+        """
+        if self.mode != SensorMode.Normal:
+            raise ValueError("Aligned sampling requires normal mode.")
+
+        period, guard, measureTime = self._get_conversion_period()
+        skip = self.const_filter_settle_samples[self.filter_coefficient] - 1 if settle else 0
+        lastData = None
+        resynced = False
+        sample = 0
+
+        syncTime = conversionEnd = self._wait_for_conversion_end(measureTime, 2 * period)
+
+        while count is None or sample < count:
+            data = self._read_multiple_bytes_as_array(self.BME280_PRESS_MSB, self.BME280_DATA_LENGTH)
+
+            if data == lastData and not resynced:
+                #Identical data is a read before the next conversion completed, or a conversion that repeats the last data.
+                #Resynchronize on the next conversion end and read again. Identical data after that is a real repeat.
+                #Correct the period from the conversions since the last synchronization, as the sensor clock is off.
+                conversionEnd = self._wait_for_conversion_end(measureTime, 2 * period)
+                conversions = round((conversionEnd - syncTime) / period)
+                if conversions > 0:
+                    period = (conversionEnd - syncTime) / conversions
+                syncTime = conversionEnd
+                resynced = True
+                continue
+
+            lastData = data
+            resynced = False
+
+            if skip > 0:
+                skip -= 1
+            else:
+                tempADC, presADC, humADC = self._decode_data(data)
+                yield self._compensate_tph(tempADC, presADC, humADC)
+                sample += 1
+
+            #Sleep until the next conversion is complete. Skip conversions missed by a slow consumer.
+            now = time.monotonic()
+            conversionEnd += period
+            if conversionEnd + guard < now:
+                conversionEnd += math.ceil((now - conversionEnd - guard) / period) * period
+            time.sleep(max(0.0, conversionEnd + guard - now))
+
+    def _get_conversion_period(self):
+        """Calculates the normal mode conversion period, the read guard time and the typical measurement time in seconds.
+        Period uses the typical measurement time, guard covers the maximum measurement time."""
+        tCycles = self.const_meas_cycles[self.temperature_oversampling >> 5]
+        pCycles = self.const_meas_cycles[self.pressure_oversampling >> 2]
+        hCycles = self.const_meas_cycles[self.humidity_oversampling]
+
+        typical = 1.0 + 2.0 * tCycles + (2.0 * pCycles + 0.5 if pCycles else 0.0) + (2.0 * hCycles + 0.5 if hCycles else 0.0)
+        maximum = 1.25 + 2.3 * tCycles + (2.3 * pCycles + 0.575 if pCycles else 0.0) + (2.3 * hCycles + 0.575 if hCycles else 0.0)
+        standby = self.const_inactive_durations[self.inactive_duration]
+
+        return (typical + standby) / 1000.0, (maximum - typical + 0.5) / 1000.0, typical / 1000.0
+
+    def _wait_for_conversion_end(self, measure_time, timeout):
+        """Waits for the end of a conversion with the measuring bit, and returns the time of it.
+        Standby is polled at half the measurement time, which still sees every measurement.
+        Once a measurement starts, polling sleeps until shortly before its expected end.
+        :param measure_time: Typical measurement time in seconds.
+        :param timeout: Time limit in seconds.
+        """
+        deadline = time.monotonic() + timeout
+        interval = measure_time / 2.0
+        measuring = None
+
+        while time.monotonic() < deadline:
+            if (self._read_register_1ubyte(self.BME280_STATUS) & 0b00001000) != 0:
+                if measuring is False:
+                    #Measurement started within the last poll interval.
+                    time.sleep(max(0.0, 0.8 * measure_time - interval))
+                else:
+                    time.sleep(0.001)
+                measuring = True
+            elif measuring:
+                return time.monotonic()
+            else:
+                measuring = False
+                time.sleep(interval)
+
+        raise TimeoutError("BME280 conversion end not detected. Check that the sensor is in normal mode.")
+
     #Disposal
     def __del__(self):
         """Releases the resources."""
@@ -361,43 +551,3 @@ class BME280Sensor:
             TemperatureOversampling.Skipped,
             PressureOversampling.Skipped,
             SensorMode.Sleep)
-
-        global calDig_T1
-        global calDig_T2
-        global calDig_T3
-        global calDig_P1
-        global calDig_P2
-        global calDig_P3
-        global calDig_P4
-        global calDig_P5
-        global calDig_P6
-        global calDig_P7
-        global calDig_P8
-        global calDig_P9
-        global calDig_H1
-        global calDig_H2
-        global calDig_H3
-        global calDig_H4
-        global calDig_H5
-        global calDig_H6
-        global fineTemperature
-
-        del calDig_T1
-        del calDig_T2
-        del calDig_T3
-        del calDig_P1
-        del calDig_P2
-        del calDig_P3
-        del calDig_P4
-        del calDig_P5
-        del calDig_P6
-        del calDig_P7
-        del calDig_P8
-        del calDig_P9
-        del calDig_H1
-        del calDig_H2
-        del calDig_H3
-        del calDig_H4
-        del calDig_H5
-        del calDig_H6
-        del fineTemperature
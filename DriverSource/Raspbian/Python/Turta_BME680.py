@@ -2,15 +2,18 @@
 # Distributed under the terms of the MIT license.
 
 # Python Driver for Bosch Sensortec BME680 Environmental Sensor
-# Version 1.01
-# Updated: July 14th, 2018
+# Version 1.02
+# Updated: October 18th, 2026
 
 # Visit https://docs.turta.io for documentation.
 
 import time
 import math
+import struct
+from collections import namedtuple
 from enum import IntEnum
-from smbus import SMBus
+from . import Turta_I2CBus
+from . import Turta_CalibrationCache
 
 #Enumerations
 
@@ -64,6 +67,19 @@ class HeaterProfileSetPoints(IntEnum):
     SP_8 = 0b00001000
     SP_9 = 0b00001001
 
+class CompensationMode(IntEnum):
+    Float = 0 #Floating point formulas.
+    Integer = 1 #Fixed point formulas. 32-bit for temperature, pressure, humidity and gas resistance.
+
+#Calibration Data
+
+BME680Calibration = namedtuple("BME680Calibration", [
+    "T1", "T2", "T3",
+    "P1", "P2", "P3", "P4", "P5", "P6", "P7", "P8", "P9", "P10",
+    "H1", "H2", "H3", "H4", "H5", "H6", "H7",
+    "GH1", "GH2", "GH3",
+    "ResHeatRange", "ResHeatVal", "RangeSwErr" ])
+
 class BME680Sensor:
     """BME680 Sensor"""
 
@@ -125,82 +141,45 @@ class BME680Sensor:
     BME680_PRESS_LSB = 0x20
     BME680_PRESS_XLSB = 0x21
     BME680_EAS_STATUS_0 = 0x1D
-
-    #Registers: Calibration
-    BME680_T2_LSB_REG = 0x8A
-    BME680_T2_MSB_REG = 0x8B
-    BME680_T3_REG = 0x8C
-    BME680_P1_LSB_REG = 0x8E
-    BME680_P1_MSB_REG = 0x8F
-    BME680_P2_LSB_REG = 0x90
-    BME680_P2_MSB_REG = 0x91
-    BME680_P3_REG = 0x92
-    BME680_P4_LSB_REG = 0x94
-    BME680_P4_MSB_REG = 0x95
-    BME680_P5_LSB_REG = 0x96
-    BME680_P5_MSB_REG = 0x97
-    BME680_P7_REG = 0x98
-    BME680_P6_REG = 0x99
-    BME680_P8_LSB_REG = 0x9C
-    BME680_P8_MSB_REG = 0x9D
-    BME680_P9_LSB_REG = 0x9E
-    BME680_P9_MSB_REG = 0x9F
-    BME680_P10_REG = 0xA0
-    BME680_H2_MSB_REG = 0xE1
-    BME680_H2_LSB_REG = 0xE2
-    BME680_H1_LSB_REG = 0xE2
-    BME680_H1_MSB_REG = 0xE3
-    BME680_H3_REG = 0xE4
-    BME680_H4_REG = 0xE5
-    BME680_H5_REG = 0xE6
-    BME680_H6_REG = 0xE7
-    BME680_H7_REG = 0xE8
-    BME680_T1_LSB_REG = 0xE9
-    BME680_T1_MSB_REG = 0xEA
-    BME680_GH2_LSB_REG = 0xEB
-    BME680_GH2_MSB_REG = 0xEC
-    BME680_GH1_REG = 0xED
-    BME680_GH3_REG = 0xEE
-    BME680_RES_HEAT_VAL = 0x00
-    BME680_RES_HEAT_RANGE = 0x02
-    BME680_RANGE_SW_ERR = 0x04
+    BME680_FIELD_0_LENGTH = 15 #0x1D to 0x2B
+
+    #Registers: Calibration Blocks
+    BME680_COEFF_1 = 0x8A
+    BME680_COEFF_1_LENGTH = 23 #0x8A to 0xA0
+    BME680_COEFF_2 = 0xE1
+    BME680_COEFF_2_LENGTH = 14 #0xE1 to 0xEE
+    BME680_COEFF_3 = 0x00
+    BME680_COEFF_3_LENGTH = 5 #0x00 to 0x04
+    BME680_CALIBRATION_LENGTH = 42
+    BME680_CALIBRATION_CHECK_LENGTH = 8 #T2, T3, P1 and P2 registers identify the chip.
 
     #Data: Calibration
-    calT1 = None
-    calT2 = None
-    calT3 = None
-    calP1 = None
-    calP2 = None
-    calP3 = None
-    calP4 = None
-    calP5 = None
-    calP6 = None
-    calP7 = None
-    calP8 = None
-    calP9 = None
-    calP10 = None
-    calH1 = None
-    calH2 = None
-    calH3 = None
-    calH4 = None
-    calH5 = None
-    calH6 = None
-    calH7 = None
-    calGH1 = None
-    calGH2 = None
-    calGH3 = None
-    fineTemperature = None
+    calibration = None
+    fineTemperature = 0
     calAmbTemp = 25
-    calResHeatRange = None
-    calResHeatVal = None
-    calRangeSwErr = None
+    compensation_mode = CompensationMode.Float
+
+    #Data: Shadow copies of control registers, None if unknown
+    _ctrl_meas = None
+    _ctrl_gas_1 = None
+
+    #Data: Forced mode measurement durations in seconds
+    tph_duration = 0.0
+    gas_duration = 0.0
+
+    #Data: Heater-on times of the heater profile set-points in seconds
+    heater_profile = None
+
+    #Data: Measurement cycles for oversampling settings
+    const_meas_cycles = [ 0, 1, 2, 4, 8, 16 ]
 
     #Data: Gas range constants for resistance calculation 
     const_array1 = [ 1, 1, 1, 1, 1, 0.99, 1, 0.992, 1, 1, 0.998, 0.995, 1, 0.99, 1, 1 ]
     const_array2 = [ 8000000, 4000000, 2000000, 1000000, 499500.4995, 248262.1648, 125000, 63004.03226, 31281.28128, 15625, 7812.5, 3906.25, 1953.125, 976.5625, 488.28125, 244.140625 ]
 
-    #I2C Config
-    bus = SMBus(1)
+    #Data: Gas range constants for fixed point resistance calculation
+    const_array1_int = [ 2147483647, 2147483647, 2147483647, 2147483647, 2147483647, 2126008810, 2147483647, 2130303777, 2147483647, 2147483647, 2143188679, 2136746228, 2147483647, 2126008810, 2147483647, 2147483647 ]
+    const_array2_int = [ 4096000000, 2048000000, 1024000000, 512000000, 255744255, 127110228, 64000000, 32258064, 16016016, 8000000, 4000000, 2000000, 1000000, 500000, 250000, 125000 ]
 
     #I2C Communication
 
@@ -218,35 +197,24 @@ class BME680Sensor:
         buffer = self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 1)
         return buffer[0]
 
-    def _read_register_1sbyte(self, reg_addr):
-        """Reads data from the I2C device.
-        :param reg_addr: Read register address.
-        """
-        buffer = self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 1)
-        val = buffer[0]
-        if val & (1 << 7) != 0:
-            val = val - (1 << 7)
-        return val
-
-    def _read_2bytes_as_ushort_lsbfirst(self, reg_addr):
+    def _read_multiple_bytes_as_array(self, reg_addr, length):
         """Reads data from the I2C device.
         :param reg_addr: Read register address.
+        :param length: Data length. Max value is 32.
         """
-        buffer = self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 2)
-        return buffer[0] + (buffer[1] << 8)
-
-    def _read_2bytes_as_short_lsbfirst(self, reg_addr):
-        """Reads data from the I2C device.
-        :param reg_addr: Read register address.
+        return self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, length)
+
+    def __init__(self, bus_number = Turta_I2CBus.DEFAULT_BUS_NUMBER, i2c_address = I2C_ADDRESS, calibration_cache = None, compensation_mode = CompensationMode.Float):
+        """Initiates the BME680 sensor to get air quality level, temperature, humidity, pressure and altitude.
+        :param bus_number: I2C bus number.
+        :param i2c_address: I2C slave address. 0x76 on IoT HAT, 0x77 for a sensor with SDO pulled high.
+        :param calibration_cache: Calibration cache file path. None to read the calibration from the sensor every time.
+        :param compensation_mode: Compensation formulas. Integer mode is faster on boards without a floating point unit.
         """
-        buffer = self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 2)
-        val = buffer[0] + (buffer[1] << 8)
-        if val & (1 << 15) != 0:
-            val = val - (1 << 15)
-        return val
-
-    def __init__(self):
-        """Initiates the BME680 sensor to get air quality level, temperature, humidity, pressure and altitude."""
+        self.bus = Turta_I2CBus.get_bus(bus_number)
+        self.I2C_ADDRESS = i2c_address
+        self.calibration_cache = calibration_cache
+        self.compensation_mode = compensation_mode
         self._read_calibration_data()
         self.configure_sensor(
             TemperatureOversamplings.x08,
@@ -266,6 +234,10 @@ class BME680Sensor:
         """Initiates a soft-reset procedure, which has the same effect like power-on reset."""
         self._write_register(self.BME680_RESET, 0xB6)
 
+        #Registers are back to their defaults.
+        self._ctrl_meas = None
+        self._ctrl_gas_1 = None
+
     def configure_sensor(self, temperature_oversampling, pressure_oversampling, humidity_oversampling, iir_filter, heat_duration, heat_temperature):
         """Sets the configuration data.
         :param temperature_oversampling: Temperature oversampling.
@@ -284,6 +256,7 @@ class BME680Sensor:
         configValue |= temperature_oversampling
         configValue |= pressure_oversampling
         self._write_register(self.BME680_CTRL_MEAS, configValue)
+        self._ctrl_meas = configValue
         time.sleep(0.001)
 
         #Select IIR Filter for temperature sensor.
@@ -299,7 +272,8 @@ class BME680Sensor:
         time.sleep(0.001)
 
         #Define heater-on time.
-        self._write_register(self.BME680_GAS_WAIT_0, self._calculate_heat_duration(heat_duration))
+        heatDurationValue = self._calculate_heat_duration(heat_duration)
+        self._write_register(self.BME680_GAS_WAIT_0, heatDurationValue)
         time.sleep(0.001)
 
         #Set heater temperature.
@@ -307,90 +281,79 @@ class BME680Sensor:
         time.sleep(0.001)
 
         #Set mode to forced mode.
-        configValue = self._read_register_1ubyte(self.BME680_CTRL_MEAS)
-        configValue |= OperationModes.ForcedMode
-        self._write_register(self.BME680_CTRL_MEAS, configValue)
+        self._trigger_forced_mode()
         time.sleep(0.001)
 
+        #Calculate the forced mode durations for the measurement deadline.
+        self._calculate_measurement_duration(temperature_oversampling, pressure_oversampling, humidity_oversampling, heatDurationValue)
+
     #Calibration and Compensation
 
     def _read_calibration_data(self):
-        """Reads the factory out calibration data from the sensor."""
-        #Declare global variables.
-        global calT1
-        global calT2
-        global calT3
-        global calP1
-        global calP2
-        global calP3
-        global calP4
-        global calP5
-        global calP6
-        global calP7
-        global calP8
-        global calP9
-        global calP10
-        global calH1
-        global calH2
-        global calH3
-        global calH4
-        global calH5
-        global calH6
-        global calH7
-        global calGH1
-        global calGH2
-        global calGH3
-        global calResHeatRange
-        global calResHeatVal
-        global calRangeSwErr
-
-        #Temperature calibration.
-        calT1 = self._read_2bytes_as_ushort_lsbfirst(self.BME680_T1_LSB_REG)
-        calT2 = self._read_2bytes_as_short_lsbfirst(self.BME680_T2_LSB_REG)
-        calT3 = self._read_register_1sbyte(self.BME680_T3_REG)
-
-        #Pressure calibration.
-        calP1 = self._read_2bytes_as_ushort_lsbfirst(self.BME680_P1_LSB_REG)
-        calP2 = self._read_2bytes_as_short_lsbfirst(self.BME680_P2_LSB_REG)
-        calP3 = self._read_register_1sbyte(self.BME680_P3_REG)
-        calP4 = self._read_2bytes_as_short_lsbfirst(self.BME680_P4_LSB_REG)
-        calP5 = self._read_2bytes_as_short_lsbfirst(self.BME680_P5_LSB_REG)
-        calP6 = self._read_register_1sbyte(self.BME680_P6_REG)
-        calP7 = self._read_register_1sbyte(self.BME680_P7_REG)
-        calP8 = self._read_2bytes_as_short_lsbfirst(self.BME680_P8_LSB_REG)
-        calP9 = self._read_2bytes_as_short_lsbfirst(self.BME680_P9_LSB_REG)
-        calP10 = self._read_register_1ubyte(self.BME680_P10_REG)
-
-        #Humidity calibration.
-        calH1 = self._read_register_1ubyte(self.BME680_H1_MSB_REG) << 4 | (self._read_register_1ubyte(self.BME680_H1_LSB_REG) & 0x0F)
-        calH2 = self._read_register_1ubyte(self.BME680_H2_MSB_REG) << 4 | ((self._read_register_1ubyte(self.BME680_H2_LSB_REG)) >> 4)
-        calH3 = self._read_register_1sbyte(self.BME680_H3_REG)
-        calH4 = self._read_register_1sbyte(self.BME680_H4_REG)
-        calH5 = self._read_register_1sbyte(self.BME680_H5_REG)
-        calH6 = self._read_register_1ubyte(self.BME680_H6_REG)
-        calH7 = self._read_register_1sbyte(self.BME680_H7_REG)
-
-        #Gas calibration.
-        calGH1 = self._read_register_1sbyte(self.BME680_GH1_REG)
-        calGH2 = self._read_2bytes_as_short_lsbfirst(self.BME680_GH2_LSB_REG)
-        calGH3 = self._read_register_1sbyte(self.BME680_GH3_REG)
+        """Reads the factory out calibration data from the sensor, or from the calibration cache if enabled."""
+        raw = None
+
+        if self.calibration_cache is not None:
+            key = Turta_CalibrationCache.make_key(self.bus.bus_number, self.I2C_ADDRESS, self._read_register_1ubyte(self.BME680_ID))
+            raw = Turta_CalibrationCache.load(self.calibration_cache, key)
+
+            #Discard the cached data if it does not belong to the connected chip.
+            if raw is not None and (len(raw) != self.BME680_CALIBRATION_LENGTH or \
+                self._read_multiple_bytes_as_array(self.BME680_COEFF_1, self.BME680_CALIBRATION_CHECK_LENGTH) != raw[:self.BME680_CALIBRATION_CHECK_LENGTH]):
+                raw = None
+
+        if raw is None:
+            raw = self._read_multiple_bytes_as_array(self.BME680_COEFF_1, self.BME680_COEFF_1_LENGTH)
+            raw += self._read_multiple_bytes_as_array(self.BME680_COEFF_2, self.BME680_COEFF_2_LENGTH)
+            raw += self._read_multiple_bytes_as_array(self.BME680_COEFF_3, self.BME680_COEFF_3_LENGTH)
+
+            if self.calibration_cache is not None:
+                try:
+                    Turta_CalibrationCache.store(self.calibration_cache, key, raw)
+                except (IOError, OSError):
+                    pass #The cache is optional, the sensor works without it.
+
+        self.calibration = self._parse_calibration_data(raw)
+
+    def _parse_calibration_data(self, raw):
+        """Decodes the calibration data blocks.
+        :param raw: Calibration blocks one, two and three respectively.
+        """
+        (calT2, calT3, calP1, calP2, calP3, calP4, calP5, calP7, calP6, calP8, calP9, calP10) = \
+            struct.unpack_from("<hbxHhbxhhbbxxhhB", bytes(raw), 0)
+        (h2Msb, h2h1Lsb, h1Msb, calH3, calH4, calH5, calH6, calH7, calT1, calGH2, calGH1, calGH3) = \
+            struct.unpack_from("<BBBbbbBbHhbb", bytes(raw), self.BME680_COEFF_1_LENGTH)
+        (calResHeatVal, resHeatRange, rangeSwErr) = \
+            struct.unpack_from("<bxBxb", bytes(raw), self.BME680_COEFF_1_LENGTH + self.BME680_COEFF_2_LENGTH)
+
+        #Humidity calibration shares the nibbles of register 0xE2.
+        calH1 = (h1Msb << 4) | (h2h1Lsb & 0x0F)
+        calH2 = (h2Msb << 4) | (h2h1Lsb >> 4)
 
         #Heat calibration.
-        calResHeatRange = (self._read_register_1ubyte(self.BME680_RES_HEAT_RANGE) & 0x30) / 16
-        calResHeatVal = self._read_register_1sbyte(self.BME680_RES_HEAT_VAL)
-        calRangeSwErr = (self._read_register_1sbyte(self.BME680_RANGE_SW_ERR) & 0xF0) / 16
+        calResHeatRange = (resHeatRange & 0x30) >> 4
+        calRangeSwErr = (rangeSwErr & -16) / 16 #Signed upper nibble.
+
+        return BME680Calibration(
+            calT1, calT2, calT3,
+            calP1, calP2, calP3, calP4, calP5, calP6, calP7, calP8, calP9, calP10,
+            calH1, calH2, calH3, calH4, calH5, calH6, calH7,
+            calGH1, calGH2, calGH3,
+            calResHeatRange, calResHeatVal, calRangeSwErr)
 
     def _compensate_temperature(self, tempADC):
         """Compensates the temperature.
         :param tempADC: Analog temperature value.
         """
-        #Declare global variable.
-        global fineTemperature
+        if self.compensation_mode == CompensationMode.Integer:
+            return self._compensate_temperature_int(tempADC)
 
-        var1 = (((tempADC / 16384.0) - (calT1 / 1024.0)) * calT2)
-        var2 = ((((tempADC / 131072.0) - (calT1 / 8192.0)) * ((tempADC / 131072.0) - (calT1 / 8192.0))) * (calT3 * 16.0))
-        fineTemperature = (var1 + var2)
-        val = fineTemperature / 5120.0
+        cal = self.calibration
+
+        var1 = (((tempADC / 16384.0) - (cal.T1 / 1024.0)) * cal.T2)
+        var2 = ((((tempADC / 131072.0) - (cal.T1 / 8192.0)) * ((tempADC / 131072.0) - (cal.T1 / 8192.0))) * (cal.T3 * 16.0))
+        self.fineTemperature = (var1 + var2)
+        val = self.fineTemperature / 5120.0
 
         return float(val)
 
@@ -398,20 +361,25 @@ class BME680Sensor:
         """Compensates the pressure.
         :param presADC: Analog pressure value.
         """
-        var1 = (float(fineTemperature) / 2.0) - 64000.0
-        var2 = var1 * var1 * (float(calP6) / 131072.0)
-        var2 = var2 + (var1 * float(calP5) * 2.0)
-        var2 = (var2 / 4.0) + (float(calP4) * 65536.0)
-        var1 = (((float(calP3) * var1 * var1) / 16384.0) + (float(calP2) * var1)) / 524288.0
-        var1 = (1.0 + (var1 / 32768.0)) * float(calP1)
+        if self.compensation_mode == CompensationMode.Integer:
+            return self._compensate_pressure_int(presADC)
+
+        cal = self.calibration
+
+        var1 = (float(self.fineTemperature) / 2.0) - 64000.0
+        var2 = var1 * var1 * (float(cal.P6) / 131072.0)
+        var2 = var2 + (var1 * float(cal.P5) * 2.0)
+        var2 = (var2 / 4.0) + (float(cal.P4) * 65536.0)
+        var1 = (((float(cal.P3) * var1 * var1) / 16384.0) + (float(cal.P2) * var1)) / 524288.0
+        var1 = (1.0 + (var1 / 32768.0)) * float(cal.P1)
         val = 1048576.0 - float(presADC)
 
         if var1 != 0:
             val = ((val - (var2 / 4096.0)) * 6250.0) / var1
-            var1 = (calP9 * val * val) / 2147483648.0
-            var2 = val * (float(calP8) / 32768.0)
-            var3 = (val / 256.0) * (val / 256.0) * (val / 256.0) * (calP10 / 131072.0)
-            val = val + (var1 + var2 + var3 + (float(calP7) * 128.0)) / 16.0
+            var1 = (cal.P9 * val * val) / 2147483648.0
+            var2 = val * (float(cal.P8) / 32768.0)
+            var3 = (val / 256.0) * (val / 256.0) * (val / 256.0) * (cal.P10 / 131072.0)
+            val = val + (var1 + var2 + var3 + (float(cal.P7) * 128.0)) / 16.0
         else:
             val = 0
 
@@ -421,11 +389,16 @@ class BME680Sensor:
         """Compensates the humidity.
         :param humADC: Analog humidity value.
         """
-        temp_comp = fineTemperature / 5120.0
-        var1 = humADC - ((calH1 * 16.0) + ((calH3 / 2.0) * temp_comp))
-        var2 = var1 * (((calH2 / 262144.0) * (1.0 + ((calH4 / 16384.0) * temp_comp) + ((calH5 / 1048576.0) * temp_comp * temp_comp))))
-        var3 = calH6 / 16384.0
-        var4 = calH7 / 2097152.0
+        if self.compensation_mode == CompensationMode.Integer:
+            return self._compensate_humidity_int(humADC)
+
+        cal = self.calibration
+
+        temp_comp = self.fineTemperature / 5120.0
+        var1 = humADC - ((cal.H1 * 16.0) + ((cal.H3 / 2.0) * temp_comp))
+        var2 = var1 * (((cal.H2 / 262144.0) * (1.0 + ((cal.H4 / 16384.0) * temp_comp) + ((cal.H5 / 1048576.0) * temp_comp * temp_comp))))
+        var3 = cal.H6 / 16384.0
+        var4 = cal.H7 / 2097152.0
         val = var2 + ((var3 + (var4 * temp_comp)) * var2 * var2)
 
         if val > 100.0:
@@ -435,30 +408,128 @@ class BME680Sensor:
 
         return float(val)
 
+    def _compensate_temperature_int(self, tempADC):
+        """Compensates the temperature with 32-bit fixed point formulas.
+        :param tempADC: Analog temperature value.
+        """
+        cal = self.calibration
+
+        var1 = (tempADC >> 3) - (cal.T1 << 1)
+        var2 = (var1 * cal.T2) >> 11
+        var3 = ((((var1 >> 1) * (var1 >> 1)) >> 12) * (cal.T3 << 4)) >> 14
+        self.fineTemperature = var2 + var3
+        val = ((self.fineTemperature * 5) + 128) >> 8 #0.01 degC resolution.
+
+        return val / 100.0
+
+    def _compensate_pressure_int(self, presADC):
+        """Compensates the pressure with 32-bit fixed point formulas.
+        :param presADC: Analog pressure value.
+        """
+        cal = self.calibration
+
+        var1 = (self.fineTemperature >> 1) - 64000
+        var2 = ((((var1 >> 2) * (var1 >> 2)) >> 11) * cal.P6) >> 2
+        var2 = var2 + ((var1 * cal.P5) << 1)
+        var2 = (var2 >> 2) + (cal.P4 << 16)
+        var1 = (((((var1 >> 2) * (var1 >> 2)) >> 13) * (cal.P3 << 5)) >> 3) + ((cal.P2 * var1) >> 1)
+        var1 = var1 >> 18
+        var1 = ((32768 + var1) * cal.P1) >> 15
+
+        if var1 == 0:
+            return 0
+
+        #The datasheet formula keeps the intermediate value in an unsigned 32-bit register.
+        val = ((1048576 - presADC - (var2 >> 12)) * 3125) & 0xFFFFFFFF
+        if val >= (1 << 30):
+            val = (val // var1) << 1
+        else:
+            val = (val << 1) // var1
+
+        var1 = (cal.P9 * (((val >> 3) * (val >> 3)) >> 13)) >> 12
+        var2 = ((val >> 2) * cal.P8) >> 13
+        var3 = ((val >> 8) * (val >> 8) * (val >> 8) * cal.P10) >> 17
+        val = val + ((var1 + var2 + var3 + (cal.P7 << 7)) >> 4)
+
+        return float(val)
+
+    def _compensate_humidity_int(self, humADC):
+        """Compensates the humidity with 32-bit fixed point formulas.
+        :param humADC: Analog humidity value.
+        """
+        cal = self.calibration
+
+        tempScaled = ((self.fineTemperature * 5) + 128) >> 8
+        var1 = (humADC - (cal.H1 * 16)) - (self._divide_int(tempScaled * cal.H3, 100) >> 1)
+        var2 = (cal.H2 * (self._divide_int(tempScaled * cal.H4, 100) + \
+            self._divide_int((tempScaled * self._divide_int(tempScaled * cal.H5, 100)) >> 6, 100) + (1 << 14))) >> 10
+        var3 = var1 * var2
+        var4 = ((cal.H6 << 7) + self._divide_int(tempScaled * cal.H7, 100)) >> 4
+        var5 = ((var3 >> 14) * (var3 >> 14)) >> 10
+        var6 = (var4 * var5) >> 1
+        val = (((var3 + var6) >> 10) * 1000) >> 12 #0.001 %RH resolution.
+
+        if val > 100000:
+            val = 100000
+        elif val < 0:
+            val = 0
+
+        return val / 1000.0
+
+    def _divide_int(self, dividend, divisor):
+        """Divides integers rounding toward zero, as the fixed point formulas expect.
+        :param dividend: Dividend.
+        :param divisor: Divisor.
+        """
+        quotient = abs(dividend) // abs(divisor)
+        return quotient if (dividend < 0) == (divisor < 0) else -quotient
+
     #Sensor Readouts
 
-    def _force_read(self, gas_measurement_enabled):
+    def _force_read(self, gas_measurement_enabled, gas_duration = None):
         """Triggers all measurements, and then waits for measurement completion.
         :param gas_measurement_enabled: Enable or disable gas measurement.
+        :param gas_duration: Heater-on time of the selected set-point in seconds. None for the configured value.
         """
         self._set_gas_measurement(gas_measurement_enabled)
+        self._trigger_forced_mode()
+
+        if gas_duration is None:
+            gas_duration = self.gas_duration
 
-        temp = self._read_register_1ubyte(self.BME680_CTRL_MEAS)
-        temp |= OperationModes.ForcedMode
-        self._write_register(self.BME680_CTRL_MEAS, temp)
+        #Sleep until the expected end of the measurement. The bus is free for other sensors meanwhile.
+        duration = self.tph_duration + (gas_duration if gas_measurement_enabled else 0.0)
+        start = time.monotonic()
+        time.sleep(duration)
 
-        while(self._get_measuring_status()):
+        #Confirm completion with a single status read. Poll only if the sensor is late, up to twice the expected duration.
+        busyMask = 0b01100000 if gas_measurement_enabled else 0b00100000
+        while ((self._read_register_1ubyte(self.BME680_EAS_STATUS_0) & busyMask) != 0):
+            if time.monotonic() - start > 2.0 * duration:
+                raise TimeoutError("BME680 measurement did not complete. Check the sensor connection.")
             time.sleep(0.001)
 
-        if (gas_measurement_enabled):
-            while (self._get_gas_measuring_status()):
-                time.sleep(0.001)
+    def _read_field_data(self):
+        """Reads the field 0 data block in one transaction and decodes it.
+        Returns temperature, pressure, humidity and gas resistance ADC values and gas range respectively."""
+        data = self._read_multiple_bytes_as_array(self.BME680_EAS_STATUS_0, self.BME680_FIELD_0_LENGTH)
+
+        #Offsets of the readout registers in the block.
+        o = self.BME680_EAS_STATUS_0
+
+        tempADC = (data[self.BME680_TEMP_MSB - o] << 12) | (data[self.BME680_TEMP_LSB - o] << 4) | (data[self.BME680_TEMP_XLSB - o] >> 4)
+        presADC = (data[self.BME680_PRESS_MSB - o] << 12) | (data[self.BME680_PRESS_LSB - o] << 4) | (data[self.BME680_PRESS_XLSB - o] >> 4)
+        humADC = (data[self.BME680_HUM_MSB - o] << 8) | data[self.BME680_HUM_LSB - o]
+        gasResADC = (data[self.BME680_GAS_R_MSB - o] << 2) | (data[self.BME680_GAS_R_LSB - o] >> 6)
+        gasRange = data[self.BME680_GAS_R_LSB - o] & 0x0F
+
+        return tempADC, presADC, humADC, gasResADC, gasRange
 
     def read_temperature(self):
         """Reads the temperature in Celcius."""
         self._force_read(False)
 
-        tempADC = (self._read_register_1ubyte(self.BME680_TEMP_MSB) << 12) | (self._read_register_1ubyte(self.BME680_TEMP_LSB) << 4) | (self._read_register_1ubyte(self.BME680_TEMP_XLSB) >> 4)
+        tempADC, presADC, humADC, gasResADC, gasRange = self._read_field_data()
 
         return float(self._compensate_temperature(tempADC))
 
@@ -466,7 +537,10 @@ class BME680Sensor:
         """Reads the relative humidity."""
         self._force_read(False)
 
-        humADC = (self._read_register_1ubyte(self.BME680_HUM_MSB) << 8) | (self._read_register_1ubyte(self.BME680_HUM_LSB))
+        tempADC, presADC, humADC, gasResADC, gasRange = self._read_field_data()
+
+        #Humidity compensation depends on the fine temperature of the same measurement.
+        self._compensate_temperature(tempADC)
 
         return float(self._compensate_humidity(humADC))
 
@@ -474,7 +548,10 @@ class BME680Sensor:
         """Reads the pressure in Pa."""
         self._force_read(False)
 
-        presADC = (self._read_register_1ubyte(self.BME680_PRESS_MSB) << 12) | (self._read_register_1ubyte(self.BME680_PRESS_LSB) << 4) | (self._read_register_1ubyte(self.BME680_PRESS_XLSB) >> 4)
+        tempADC, presADC, humADC, gasResADC, gasRange = self._read_field_data()
+
+        #Pressure compensation depends on the fine temperature of the same measurement.
+        self._compensate_temperature(tempADC)
 
         return float(self._compensate_pressure(presADC))
 
@@ -488,16 +565,11 @@ class BME680Sensor:
 
     def read_gas_resistance(self):
         """Reads the gas resistance."""
-        #Declare global variables
-        global calAmbTemp
-
         self._force_read(True)
 
-        tempADC = (self._read_register_1ubyte(self.BME680_TEMP_MSB) << 12) | (self._read_register_1ubyte(self.BME680_TEMP_LSB) << 4) | (self._read_register_1ubyte(self.BME680_TEMP_XLSB) >> 4)
-        gasResADC = (self._read_register_1ubyte(self.BME680_GAS_R_MSB) << 2) | (self._read_register_1ubyte(self.BME680_GAS_R_LSB) >> 6)
-        gasRange = self._read_register_1ubyte(self.BME680_GAS_R_LSB) & 0x0F
+        tempADC, presADC, humADC, gasResADC, gasRange = self._read_field_data()
 
-        calAmbTemp = self._compensate_temperature(tempADC)
+        self.calAmbTemp = self._compensate_temperature(tempADC)
         val = self._calculate_gas_resistance(gasResADC, gasRange)
 
         return float(val)
@@ -508,9 +580,7 @@ class BME680Sensor:
 
         self._force_read(False)
 
-        tempADC = (self._read_register_1ubyte(self.BME680_TEMP_MSB) << 12) | (self._read_register_1ubyte(self.BME680_TEMP_LSB) << 4) | (self._read_register_1ubyte(self.BME680_TEMP_XLSB) >> 4)
-        presADC = (self._read_register_1ubyte(self.BME680_PRESS_MSB) << 12) | (self._read_register_1ubyte(self.BME680_PRESS_LSB) << 4) | (self._read_register_1ubyte(self.BME680_PRESS_XLSB) >> 4)
-        humADC = (self._read_register_1ubyte(self.BME680_HUM_MSB) << 8) | (self._read_register_1ubyte(self.BME680_HUM_LSB))
+        tempADC, presADC, humADC, gasResADC, gasRange = self._read_field_data()
 
         resultsTPH[0] = float(self._compensate_temperature(tempADC))
         resultsTPH[1] = float(self._compensate_pressure(presADC))
@@ -518,55 +588,149 @@ class BME680Sensor:
 
         return resultsTPH
 
+    def read_all(self):
+        """Reads temperature, pressure, relative humidity and gas resistance from a single measurement cycle."""
+        results = [ 0.0, 0.0, 0.0, 0.0 ]
+
+        self._force_read(True)
+
+        tempADC, presADC, humADC, gasResADC, gasRange = self._read_field_data()
+
+        results[0] = float(self._compensate_temperature(tempADC))
+        results[1] = float(self._compensate_pressure(presADC))
+        results[2] = float(self._compensate_humidity(humADC))
+        results[3] = float(self._calculate_gas_resistance(gasResADC, gasRange))
+
+        self.calAmbTemp = results[0]
+
+        return results
+
+    #Heater Profile Scan
+
+    def configure_heater_profile(self, steps):
+        """Programs the heater set-points once for heater profile scans.
+        Set-point 0 is also used by read_gas_resistance and read_all afterwards.
+        :param steps: List of (heat_temperature, heat_duration) tuples for set-points 0 to 9. Temperature in C, max value is 400. Duration in ms, max value is 252.
+        """
+        if len(steps) < 1 or len(steps) > 10:
+            raise ValueError("Heater profile must have 1 to 10 steps.")
+
+        #Write all set-points with two transactions, as register address and data pairs.
+        resHeat = [ ]
+        gasWait = [ ]
+        durations = [ ]
+        for index, (heat_temperature, heat_duration) in enumerate(steps):
+            heatDurationValue = self._calculate_heat_duration(heat_duration)
+            resHeat += [ self.BME680_RES_HEAT_0 + index, self._calculate_heater_resistance(heat_temperature) ]
+            gasWait += [ self.BME680_GAS_WAIT_0 + index, heatDurationValue ]
+            durations.append(((heatDurationValue & 0x3F) << (2 * (heatDurationValue >> 6))) / 1000.0)
+
+        self.bus.write_i2c_block_data(self.I2C_ADDRESS, resHeat[0], resHeat[1:])
+        self.bus.write_i2c_block_data(self.I2C_ADDRESS, gasWait[0], gasWait[1:])
+
+        self.heater_profile = durations
+        self.gas_duration = durations[0]
+
+    def scan_heater_profile(self, scans = None):
+        """Cycles through the heater set-points programmed by configure_heater_profile.
+        Yields a list of gas resistances in Ohms, one for each set-point, per scan.
+        :param scans: Number of scans. None to scan until the generator is closed.
+        """
+        if self.heater_profile is None:
+            raise ValueError("Heater profile is not configured.")
+
+        scan = 0
+        try:
+            while scans is None or scan < scans:
+                resistances = [ 0.0 ] * len(self.heater_profile)
+
+                for index, duration in enumerate(self.heater_profile):
+                    #Only the selected set-point index changes between steps.
+                    self._select_heater_profile_setpoint(index)
+                    self._force_read(True, duration)
+
+                    tempADC, presADC, humADC, gasResADC, gasRange = self._read_field_data()
+
+                    self.calAmbTemp = self._compensate_temperature(tempADC)
+                    resistances[index] = float(self._calculate_gas_resistance(gasResADC, gasRange))
+
+                scan += 1
+                yield resistances
+        finally:
+            self._select_heater_profile_setpoint(HeaterProfileSetPoints.SP_0)
+
     #Internal Methods
 
     def _set_gas_measurement(self, state):
         """Turns gas measurement on of off.
         :param state: Gas measurement mode. True for on, false for off.
         """
-        configValue = self._read_register_1ubyte(self.BME680_CTRL_GAS_1)
+        with self.bus:
+            configValue = self._read_ctrl_gas_1()
 
-        if state:
-            configValue |= 0b00010000
-        else:
-            configValue &= 0b11101111
+            if state:
+                configValue |= 0b00010000
+            else:
+                configValue &= 0b11101111
 
-        self._write_register(self.BME680_CTRL_GAS_1, configValue)
+            self._write_ctrl_gas_1(configValue)
 
     def _select_heater_profile_setpoint(self, heaterProfileSetPoint):
         """Selects heater set-points of the sensor that will be used in forced mode.
         :param heaterProfileSetPoint: Heater profile set-point.
         """
-        self._write_register(self.BME680_CTRL_GAS_1, heaterProfileSetPoint)
-
-    def _get_measuring_status(self):
-        """Gets the measuring status from the measuring bit."""
-        readValue = self._read_register_1ubyte(self.BME680_EAS_STATUS_0)
+        with self.bus:
+            configValue = self._read_ctrl_gas_1()
+            configValue = (configValue & 0b11110000) | heaterProfileSetPoint
+            self._write_ctrl_gas_1(configValue)
 
-        return True if ((readValue & 0b00100000) == 0b00100000) else False
+    def _read_ctrl_gas_1(self):
+        """Gets the gas control register value from the shadow copy. Reads the register only if the copy is unknown."""
+        if self._ctrl_gas_1 is None:
+            self._ctrl_gas_1 = self._read_register_1ubyte(self.BME680_CTRL_GAS_1)
 
-    def _get_gas_measuring_status(self):
-        """Gets the gas measurement running status from the gas_measuring bit."""
-        readValue = self._read_register_1ubyte(self.BME680_EAS_STATUS_0)
+        return self._ctrl_gas_1
 
-        return True if ((readValue & 0b01000000) == 0b01000000) else False
+    def _write_ctrl_gas_1(self, configValue):
+        """Writes the gas control register if the value differs from the shadow copy.
+        :param configValue: Register value.
+        """
+        if configValue != self._ctrl_gas_1:
+            self._write_register(self.BME680_CTRL_GAS_1, configValue)
+            self._ctrl_gas_1 = configValue
 
-    def _get_new_data_status(self):
-        """Gets the new data status from the new_data_0 bit."""
-        readValue = self._read_register_1ubyte(self.BME680_EAS_STATUS_0)
+    def _trigger_forced_mode(self):
+        """Starts a forced mode measurement cycle."""
+        with self.bus:
+            if self._ctrl_meas is None:
+                self._ctrl_meas = self._read_register_1ubyte(self.BME680_CTRL_MEAS) & 0b11111100
 
-        return True if ((readValue & 0b10000000) == 0b10000000) else False
+            self._write_register(self.BME680_CTRL_MEAS, self._ctrl_meas | OperationModes.ForcedMode)
 
     def _calculate_gas_resistance(self, gasResADC, gasRange):
         """Calculates the gas resistance value.
         :param gasResADC: ADC resistance value.
         :param gasRange: ADC range.
         """
-        var1 = (1340.0 + 5.0 * calRangeSwErr) * self.const_array1[gasRange]
+        if self.compensation_mode == CompensationMode.Integer:
+            return self._calculate_gas_resistance_int(gasResADC, gasRange)
+
+        var1 = (1340.0 + 5.0 * self.calibration.RangeSwErr) * self.const_array1[gasRange]
         gasres = var1 * self.const_array2[gasRange] / (gasResADC - 512.0 + var1)
 
         return gasres
 
+    def _calculate_gas_resistance_int(self, gasResADC, gasRange):
+        """Calculates the gas resistance value with fixed point formulas.
+        :param gasResADC: ADC resistance value.
+        :param gasRange: ADC range.
+        """
+        var1 = ((1340 + (5 * int(self.calibration.RangeSwErr))) * self.const_array1_int[gasRange]) >> 16
+        var2 = ((gasResADC << 15) - 16777216) + var1
+        var3 = (self.const_array2_int[gasRange] * var1) >> 9
+
+        return float((var3 + (var2 >> 1)) // var2)
+
     def _calculate_heater_resistance(self, target_temp):
         """Calculates the heater resistance value for target heater resistance (Res_Heat_X) registers.
         :param targetTemp: Target temperature.
@@ -574,12 +738,14 @@ class BME680Sensor:
         if target_temp > 400: #Maximum temperature
             target_temp = 400
 
-        var1 = (calGH1 / 16.0) + 49.0
-        var2 = ((calGH2 / 32768.0) * 0.0005) + 0.00235
-        var3 = calGH3 / 1024.0
+        cal = self.calibration
+
+        var1 = (cal.GH1 / 16.0) + 49.0
+        var2 = ((cal.GH2 / 32768.0) * 0.0005) + 0.00235
+        var3 = cal.GH3 / 1024.0
         var4 = var1 * (1.0 + (var2 * target_temp))
         var5 = var4 + (var3 * self.calAmbTemp)
-        res_heat = 3.4 * ((var5 * (4 / (4 + calResHeatRange)) * (1 / (1 + (calResHeatVal * 0.002)))) - 25)
+        res_heat = 3.4 * ((var5 * (4 / (4 + cal.ResHeatRange)) * (1 / (1 + (cal.ResHeatVal * 0.002)))) - 25)
 
         return int(res_heat)
 
@@ -593,72 +759,31 @@ class BME680Sensor:
             durval = 0xFF #Max duration
         else:
             while dur > 0x3F:
-                dur = dur / 4
+                dur = dur // 4
                 factor += 1
             durval = dur + (factor * 64)
 
         return durval
 
+    def _calculate_measurement_duration(self, temperature_oversampling, pressure_oversampling, humidity_oversampling, heat_duration_value):
+        """Calculates the forced mode measurement durations.
+        :param temperature_oversampling: Temperature oversampling.
+        :param pressure_oversampling: Pressure oversampling.
+        :param humidity_oversampling: Humidity oversampling.
+        :param heat_duration_value: Gas sensor wait time (Gas_Wait_X) register value.
+        """
+        measCycles = self.const_meas_cycles[temperature_oversampling >> 5] + \
+            self.const_meas_cycles[pressure_oversampling >> 2] + \
+            self.const_meas_cycles[humidity_oversampling]
+
+        #Measurement cycles, TPH switching, gas switching and wake up durations in us.
+        self.tph_duration = (measCycles * 1963 + 477 * 4 + 477 * 5 + 1000) / 1000000.0
+
+        #Heater-on time is the 6-bit value multiplied by 1, 4, 16 or 64, in ms.
+        self.gas_duration = ((heat_duration_value & 0x3F) << (2 * (heat_duration_value >> 6))) / 1000.0
+
     #Disposal
     def __del__(self):
         """Releases the resources."""
         #Reset sensor to turn off its functionality.
         self.reset_sensor()
-
-        global calT1
-        global calT2
-        global calT3
-        global calP1
-        global calP2
-        global calP3
-        global calP4
-        global calP5
-        global calP6
-        global calP7
-        global calP8
-        global calP9
-        global calP10
-        global calH1
-        global calH2
-        global calH3
-        global calH4
-        global calH5
-        global calH6
-        global calH7
-        global calGH1
-        global calGH2
-        global calGH3
-        global fineTemperature
-        global calAmbTemp
-        global calResHeatRange
-        global calResHeatVal
-        global calRangeSwErr
-
-        del calT1
-        del calT2
-        del calT3
-        del calP1
-        del calP2
-        del calP3
-        del calP4
-        del calP5
-        del calP6
-        del calP7
-        del calP8
-        del calP9
-        del calP10
-        del calH1
-        del calH2
-        del calH3
-        del calH4
-        del calH5
-        del calH6
-        del calH7
-        del calGH1
-        del calGH2
-        del calGH3
-        del fineTemperature
-        del calAmbTemp
-        del calResHeatRange
-        del calResHeatVal
-        del calRangeSwErr
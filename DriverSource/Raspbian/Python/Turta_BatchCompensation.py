@@ -0,0 +1,125 @@
+# Turta IoT HAT Helper for Raspbian
+# Distributed under the terms of the MIT license.
+
+# Python Batch Compensation for Bosch Sensortec BME280 and BME680 Environmental Sensors
+# Version 1.00
+# Updated: October 18th, 2026
+
+# Visit https://docs.turta.io for documentation.
+
+# Compensates recorded raw ADC values in bulk with NumPy. Results match the floating point
+# compensation of BME280Sensor and BME680Sensor. Calibration objects are BME280Calibration
+# and BME680Calibration tuples, or any object with the same attributes, e.g. values saved
+# alongside a log of raw readings.
+
+import numpy as np
+
+#BME680 gas range constants for resistance calculation, same as BME680Sensor.
+BME680_CONST_ARRAY1 = np.array([ 1, 1, 1, 1, 1, 0.99, 1, 0.992, 1, 1, 0.998, 0.995, 1, 0.99, 1, 1 ])
+BME680_CONST_ARRAY2 = np.array([ 8000000, 4000000, 2000000, 1000000, 499500.4995, 248262.1648, 125000, 63004.03226, 31281.28128, 15625, 7812.5, 3906.25, 1953.125, 976.5625, 488.28125, 244.140625 ])
+
+#BME280
+
+def bme280_compensate(calibration, temp_adc, pres_adc, hum_adc):
+    """Compensates BME280 raw ADC arrays.
+    Returns temperature in Celcius, pressure in Pa and relative humidity arrays respectively.
+    :param calibration: BME280 calibration data.
+    :param temp_adc: Analog temperature values.
+    :param pres_adc: Analog pressure values.
+    :param hum_adc: Analog humidity values.
+    """
+    cal = calibration
+    temp_adc = np.asarray(temp_adc, dtype = np.float64)
+    pres_adc = np.asarray(pres_adc, dtype = np.float64)
+    hum_adc = np.asarray(hum_adc, dtype = np.float64)
+
+    #Temperature
+    var1 = (temp_adc / 16384.0 - cal.T1 / 1024.0) * cal.T2
+    var2 = ((temp_adc / 131072.0 - cal.T1 / 8192.0) * (temp_adc / 131072.0 - cal.T1 / 8192.0)) * cal.T3
+    fineTemperature = var1 + var2
+    temperature = fineTemperature / 5120.0
+
+    #Pressure
+    var1 = (fineTemperature / 2.0) - 64000.0
+    var2 = var1 * var1 * cal.P6 / 32768.0
+    var2 = var2 + var1 * cal.P5 * 2.0
+    var2 = (var2 / 4.0) + (cal.P4 * 65536.0)
+    var1 = (cal.P3 * var1 * var1 / 524288.0 + cal.P2 * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * cal.P1
+
+    valid = var1 != 0.0
+    safeVar1 = np.where(valid, var1, 1.0)
+    val = 1048576.0 - pres_adc
+    val = (val - (var2 / 4096.0)) * 6250.0 / safeVar1
+    var1 = cal.P9 * val * val / 2147483648.0
+    var2 = val * cal.P8 / 32768.0
+    pressure = np.where(valid, val + (var1 + var2 + cal.P7) / 16.0, 0.0)
+
+    #Humidity
+    val = fineTemperature - 76800.0
+    val = (hum_adc - (cal.H4 * 64.0 + cal.H5 / 16384.0 * val)) * (cal.H2 / 65536.0 * (1.0 + cal.H6 / 67108864.0 * val * (1.0 + cal.H3 / 67108864.0 * val)))
+    val = val * (1.0 - cal.H1 * val / 524288.0)
+    humidity = np.clip(val, 0.0, 100.0)
+
+    return temperature, pressure, humidity
+
+#BME680
+
+def bme680_compensate(calibration, temp_adc, pres_adc, hum_adc):
+    """Compensates BME680 raw ADC arrays.
+    Returns temperature in Celcius, pressure in Pa and relative humidity arrays respectively.
+    :param calibration: BME680 calibration data.
+    :param temp_adc: Analog temperature values.
+    :param pres_adc: Analog pressure values.
+    :param hum_adc: Analog humidity values.
+    """
+    cal = calibration
+    temp_adc = np.asarray(temp_adc, dtype = np.float64)
+    pres_adc = np.asarray(pres_adc, dtype = np.float64)
+    hum_adc = np.asarray(hum_adc, dtype = np.float64)
+
+    #Temperature
+    var1 = (((temp_adc / 16384.0) - (cal.T1 / 1024.0)) * cal.T2)
+    var2 = ((((temp_adc / 131072.0) - (cal.T1 / 8192.0)) * ((temp_adc / 131072.0) - (cal.T1 / 8192.0))) * (cal.T3 * 16.0))
+    fineTemperature = var1 + var2
+    temperature = fineTemperature / 5120.0
+
+    #Pressure
+    var1 = (fineTemperature / 2.0) - 64000.0
+    var2 = var1 * var1 * (float(cal.P6) / 131072.0)
+    var2 = var2 + (var1 * float(cal.P5) * 2.0)
+    var2 = (var2 / 4.0) + (float(cal.P4) * 65536.0)
+    var1 = (((float(cal.P3) * var1 * var1) / 16384.0) + (float(cal.P2) * var1)) / 524288.0
+    var1 = (1.0 + (var1 / 32768.0)) * float(cal.P1)
+
+    valid = var1 != 0.0
+    safeVar1 = np.where(valid, var1, 1.0)
+    val = 1048576.0 - pres_adc
+    val = ((val - (var2 / 4096.0)) * 6250.0) / safeVar1
+    var1 = (cal.P9 * val * val) / 2147483648.0
+    var2 = val * (float(cal.P8) / 32768.0)
+    var3 = (val / 256.0) * (val / 256.0) * (val / 256.0) * (cal.P10 / 131072.0)
+    pressure = np.where(valid, val + (var1 + var2 + var3 + (float(cal.P7) * 128.0)) / 16.0, 0.0)
+
+    #Humidity
+    temp_comp = fineTemperature / 5120.0
+    var1 = hum_adc - ((cal.H1 * 16.0) + ((cal.H3 / 2.0) * temp_comp))
+    var2 = var1 * (((cal.H2 / 262144.0) * (1.0 + ((cal.H4 / 16384.0) * temp_comp) + ((cal.H5 / 1048576.0) * temp_comp * temp_comp))))
+    var3 = cal.H6 / 16384.0
+    var4 = cal.H7 / 2097152.0
+    humidity = np.clip(var2 + ((var3 + (var4 * temp_comp)) * var2 * var2), 0.0, 100.0)
+
+    return temperature, pressure, humidity
+
+def bme680_gas_resistance(calibration, gas_res_adc, gas_range):
+    """Calculates BME680 gas resistance arrays in Ohms.
+    :param calibration: BME680 calibration data.
+    :param gas_res_adc: ADC resistance values.
+    :param gas_range: ADC ranges.
+    """
+    gas_res_adc = np.asarray(gas_res_adc, dtype = np.float64)
+    gas_range = np.asarray(gas_range, dtype = np.intp)
+
+    var1 = (1340.0 + 5.0 * calibration.RangeSwErr) * BME680_CONST_ARRAY1[gas_range]
+
+    return var1 * BME680_CONST_ARRAY2[gas_range] / (gas_res_adc - 512.0 + var1)
@@ -0,0 +1,64 @@
+# Turta IoT HAT Helper for Raspbian
+# Distributed under the terms of the MIT license.
+
+# Python Sensor Calibration Cache
+# Version 1.00
+# Updated: October 18th, 2026
+
+# Visit https://docs.turta.io for documentation.
+
+import json
+import os
+import threading
+
+#File access lock for the drivers in this process.
+_file_lock = threading.Lock()
+
+def make_key(bus_number, i2c_address, chip_id):
+    """Builds the cache key of a sensor.
+    :param bus_number: I2C bus number.
+    :param i2c_address: I2C slave address.
+    :param chip_id: Chip ID register value.
+    """
+    return "%d:0x%02X:0x%02X" % (bus_number, i2c_address, chip_id)
+
+def _read_file(path):
+    """Reads all entries of the cache file. Returns an empty dictionary if the file is missing or damaged.
+    :param path: Cache file path.
+    """
+    try:
+        with open(path, "r") as f:
+            entries = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+    return entries if isinstance(entries, dict) else {}
+
+def load(path, key):
+    """Loads the raw calibration bytes of a sensor. Returns None if there is no valid entry.
+    :param path: Cache file path.
+    :param key: Cache key.
+    """
+    with _file_lock:
+        entry = _read_file(path).get(key)
+
+    if not isinstance(entry, list) or not all(isinstance(b, int) and 0 <= b <= 0xFF for b in entry):
+        return None
+
+    return entry
+
+def store(path, key, data):
+    """Stores the raw calibration bytes of a sensor. Other entries in the file are kept.
+    :param path: Cache file path.
+    :param key: Cache key.
+    :param data: Raw calibration bytes.
+    """
+    with _file_lock:
+        entries = _read_file(path)
+        entries[key] = [ int(b) & 0xFF for b in data ]
+
+        #Write to a temporary file and swap it in, so readers never see a partial file.
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(entries, f, sort_keys = True)
+        os.replace(temp_path, path)
@@ -0,0 +1,106 @@
+# Turta IoT HAT Helper for Raspbian
+# Distributed under the terms of the MIT license.
+
+# Python Shared I2C Bus Manager
+# Version 1.00
+# Updated: October 18th, 2026
+
+# Visit https://docs.turta.io for documentation.
+
+import threading
+from smbus import SMBus
+
+#Default I2C bus number of the Raspberry Pi header.
+DEFAULT_BUS_NUMBER = 1
+
+class I2CBus:
+    """Shared I2C Bus
+    Opens the bus device on first use and serializes all transactions with one lock.
+    Use the bus as a context manager to hold the lock over multi-step register sequences."""
+
+    def __init__(self, bus_number):
+        """Creates the bus manager without opening the bus device.
+        :param bus_number: I2C bus number. 1 for /dev/i2c-1.
+        """
+        self.bus_number = bus_number
+        self.lock = threading.RLock()
+        self._smbus = None
+
+    def _get_smbus(self):
+        """Opens the bus device on first use."""
+        if self._smbus is None:
+            self._smbus = SMBus(self.bus_number)
+        return self._smbus
+
+    #Locking
+
+    def __enter__(self):
+        """Acquires the bus lock."""
+        self.lock.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Releases the bus lock."""
+        self.lock.release()
+        return False
+
+    #I2C Transactions
+
+    def write_i2c_block_data(self, i2c_address, reg_addr, data):
+        """Writes a block of data to the I2C device.
+        :param i2c_address: I2C slave address.
+        :param reg_addr: Register address.
+        :param data: Data bytes.
+        """
+        with self.lock:
+            self._get_smbus().write_i2c_block_data(i2c_address, reg_addr, data)
+
+    def write_byte(self, i2c_address, data):
+        """Writes a single byte without a register address, as used by command registers.
+        :param i2c_address: I2C slave address.
+        :param data: Data byte.
+        """
+        with self.lock:
+            self._get_smbus().write_byte(i2c_address, data)
+
+    def read_i2c_block_data(self, i2c_address, reg_addr, length):
+        """Reads a block of data from the I2C device.
+        :param i2c_address: I2C slave address.
+        :param reg_addr: Read register address.
+        :param length: Data length. Max value is 32.
+        """
+        with self.lock:
+            return self._get_smbus().read_i2c_block_data(i2c_address, reg_addr, length)
+
+    def read_word_data(self, i2c_address, reg_addr):
+        """Reads a 16-bit word from the I2C device, LSB first.
+        :param i2c_address: I2C slave address.
+        :param reg_addr: Read register address.
+        """
+        with self.lock:
+            return self._get_smbus().read_word_data(i2c_address, reg_addr)
+
+    #Disposal
+
+    def close(self):
+        """Closes the bus device. It will be reopened on next use."""
+        with self.lock:
+            if self._smbus is not None:
+                self._smbus.close()
+                self._smbus = None
+
+#Shared Buses
+
+_buses = {}
+_buses_lock = threading.Lock()
+
+def get_bus(bus_number = DEFAULT_BUS_NUMBER):
+    """Returns the shared bus manager for the bus number.
+    :param bus_number: I2C bus number. 1 for /dev/i2c-1.
+    """
+    with _buses_lock:
+        bus = _buses.get(bus_number)
+        if bus is None:
+            bus = I2CBus(bus_number)
+            _buses[bus_number] = bus
+        return bus
@@ -0,0 +1,153 @@
+# Turta IoT HAT Helper for Raspbian
+# Distributed under the terms of the MIT license.
+
+# Python Indoor Air Quality Estimator for Bosch Sensortec BME680 Environmental Sensor
+# Version 1.00
+# Updated: October 18th, 2026
+
+# Visit https://docs.turta.io for documentation.
+
+import json
+import math
+import os
+import time
+from collections import namedtuple
+from enum import IntEnum
+
+#Enumerations
+
+class BurnInStatus(IntEnum):
+    Stabilizing = 0 #Heater and baseline are settling, score is not usable.
+    Learning = 1 #Baseline is still adapting, score is indicative.
+    Ready = 2 #Burn-in is complete.
+
+#Results
+
+IAQResult = namedtuple("IAQResult", [ "iaq", "air_quality_score", "gas_baseline", "status" ])
+
+class IAQEstimator:
+    """Streaming Indoor Air Quality Estimator
+    Consumes BME680 gas resistance and relative humidity samples, keeps a rolling clean air baseline with constant memory,
+    and calculates an IAQ index from 0 (excellent) to 500 (hazardous)."""
+
+    #Defaults
+    humidity_baseline = 40.0 #Optimal indoor relative humidity in %RH.
+    humidity_weighting = 0.25 #Share of humidity in the air quality score.
+    stabilization_time = 300.0 #Time to reach Learning status in seconds.
+    burn_in_time = 172800.0 #Time to reach Ready status in seconds, 48 hours.
+    baseline_rise_time = 300.0 #Time constant for cleaner air in seconds.
+    baseline_decay_time = 86400.0 #Time constant for worse air in seconds.
+    max_sample_gap = 60.0 #Longest sample interval counted as operating time in seconds.
+
+    def __init__(self, checkpoint_path = None):
+        """Initiates the estimator.
+        :param checkpoint_path: Baseline checkpoint file path. Restored if it exists. None to start without a checkpoint.
+        """
+        self.gas_baseline = None
+        self.operating_time = 0.0
+        self.checkpoint_path = checkpoint_path
+        self._last_timestamp = None
+
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            self.load_baseline(checkpoint_path)
+
+    #Estimation
+
+    def update(self, gas_resistance, humidity, timestamp = None):
+        """Updates the baseline with a sample and calculates the IAQ index.
+        :param gas_resistance: Gas resistance in Ohms.
+        :param humidity: Relative humidity in %RH.
+        :param timestamp: Sample time in seconds from a monotonic clock. None to use the current time.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        #Count operating time, ignoring gaps where the heater was probably off.
+        dt = 0.0 if self._last_timestamp is None else max(0.0, timestamp - self._last_timestamp)
+        dt = min(dt, self.max_sample_gap)
+        self._last_timestamp = timestamp
+        self.operating_time += dt
+
+        #Track the clean air baseline: follow cleaner air quickly, worse air slowly.
+        if self.gas_baseline is None:
+            self.gas_baseline = float(gas_resistance)
+        else:
+            timeConstant = self.baseline_rise_time if gas_resistance > self.gas_baseline else self.baseline_decay_time
+            self.gas_baseline += (1.0 - math.exp(-dt / timeConstant)) * (gas_resistance - self.gas_baseline)
+
+        score = self._calculate_air_quality_score(gas_resistance, humidity)
+
+        return IAQResult((100.0 - score) * 5.0, score, self.gas_baseline, self.get_status())
+
+    def get_status(self):
+        """Gets the burn-in status from the operating time."""
+        if self.operating_time < self.stabilization_time:
+            return BurnInStatus.Stabilizing
+        elif self.operating_time < self.burn_in_time:
+            return BurnInStatus.Learning
+        else:
+            return BurnInStatus.Ready
+
+    def _calculate_air_quality_score(self, gas_resistance, humidity):
+        """Calculates the air quality score from 0 (worst) to 100 (best).
+        :param gas_resistance: Gas resistance in Ohms.
+        :param humidity: Relative humidity in %RH.
+        """
+        humidityShare = self.humidity_weighting * 100.0
+        gasShare = 100.0 - humidityShare
+
+        #Humidity score falls linearly away from the optimal humidity.
+        humidityOffset = humidity - self.humidity_baseline
+        if humidityOffset > 0:
+            humidityScore = (100.0 - self.humidity_baseline - humidityOffset) / (100.0 - self.humidity_baseline) * humidityShare
+        else:
+            humidityScore = (self.humidity_baseline + humidityOffset) / self.humidity_baseline * humidityShare
+        humidityScore = min(max(humidityScore, 0.0), humidityShare)
+
+        #Gas score falls as gas resistance drops below the clean air baseline.
+        if gas_resistance < self.gas_baseline:
+            gasScore = gas_resistance / self.gas_baseline * gasShare
+        else:
+            gasScore = gasShare
+        gasScore = max(gasScore, 0.0)
+
+        return humidityScore + gasScore
+
+    #Checkpoints
+
+    def _get_checkpoint_path(self, path):
+        """Returns the checkpoint file path to use.
+        :param path: Checkpoint file path. None for the path given to the constructor.
+        """
+        path = self.checkpoint_path if path is None else path
+        if path is None:
+            raise ValueError("No checkpoint path. Give a path, or set checkpoint_path in the constructor.")
+
+        return path
+
+    def save_baseline(self, path = None):
+        """Saves the baseline and operating time, so a restart does not repeat the burn-in.
+        :param path: Checkpoint file path. None for the path given to the constructor.
+        """
+        path = self._get_checkpoint_path(path)
+
+        #Write to a temporary file, flush it to disk and swap it in, so a power cut never leaves a partial checkpoint.
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({ "gas_baseline": self.gas_baseline, "operating_time": self.operating_time }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def load_baseline(self, path = None):
+        """Restores the baseline and operating time from a checkpoint.
+        :param path: Checkpoint file path. None for the path given to the constructor.
+        """
+        path = self._get_checkpoint_path(path)
+
+        with open(path, "r") as f:
+            checkpoint = json.load(f)
+
+        self.gas_baseline = checkpoint["gas_baseline"]
+        self.operating_time = float(checkpoint["operating_time"])
+        self._last_timestamp = None
@@ -2,14 +2,90 @@
 # Distributed under the terms of the MIT license.
 
 # Python Driver for IO Port
-# Version 1.02
-# Updated: February 16th, 2019
+# Version 1.03
+# Updated: October 18th, 2026
 
 # Visit https://docs.turta.io for documentation.
 
-from time import sleep
+import time
+import math
+import threading
+from array import array
+from collections import namedtuple
+from enum import IntEnum
 import RPi.GPIO as GPIO
-from smbus import SMBus
+from . import Turta_I2CBus, Turta_Scheduling
+
+#NumPy is optional, it speeds up bulk conversions.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#Enumerations
+
+#EDGE: Detected edges of the digital inputs
+class EDGE(IntEnum):
+    RISING = 1
+    FALLING = 2
+    BOTH = 3
+
+#Analog Scan Statistics
+
+AnalogScanStatistics = namedtuple("AnalogScanStatistics", [ "sweeps", "rate", "jitter", "overruns", "dropped" ])
+
+#Pulse Counting
+
+class PulseCounter:
+    """Pulse Counter
+    Counts pulses and keeps the timestamps of the last pulses for frequency and period estimation."""
+
+    def __init__(self, window = 16):
+        """Initiates the counter.
+        :param window: Number of last pulses used for estimation.
+        """
+        if window < 2:
+            raise ValueError("Window must be at least two pulses.")
+
+        self._lock = threading.Lock()
+        self.timestamps = array('q', [ 0 ]) * window
+        self.count = 0
+
+    def add(self, timestamp):
+        """Counts a pulse.
+        :param timestamp: Pulse time in ns.
+        """
+        with self._lock:
+            self.timestamps[self.count % len(self.timestamps)] = timestamp
+            self.count += 1
+
+    def reset(self):
+        """Clears the count and the pulse history."""
+        with self._lock:
+            self.count = 0
+
+    def get_period(self):
+        """Estimates the pulse period in s. Returns None until two pulses are counted."""
+        with self._lock:
+            window = len(self.timestamps)
+            count = self.count
+            if count < 2:
+                return None
+
+            pulses = min(count, window)
+            first = self.timestamps[(count - pulses) % window]
+            last = self.timestamps[(count - 1) % window]
+
+        period = (last - first) / (pulses - 1)
+
+        #If the pulses stopped, the period is at least the time since the last one.
+        period = max(period, time.monotonic_ns() - last)
+        return period / 1000000000.0
+
+    def get_frequency(self):
+        """Estimates the pulse frequency in Hz. Returns 0 until two pulses are counted."""
+        period = self.get_period()
+        return 1.0 / period if period else 0.0
 
 class IOPort:
     "IO Port"
@@ -29,8 +105,23 @@ class IOPort:
     MCU_ANALOGIN_CH3 = 0x12
     MCU_ANALOGIN_CH4 = 0x13
 
-    #I2C Config
-    bus = SMBus(1)
+    #Data: Analog input registers of the channels
+    const_analog_registers = { 1: MCU_ANALOGIN_CH1, 2: MCU_ANALOGIN_CH2, 3: MCU_ANALOGIN_CH3, 4: MCU_ANALOGIN_CH4 }
+
+    #Analog Scale
+    ANALOG_MAX_CODE = 1023.0
+
+    #Analog Scan
+    _scan_worker = None
+    _scan_lock = None #Guards the ring buffer, its count and the read cursor.
+    _scan_cursor = 0
+    scan_timestamps = None
+    scan_codes = None
+    scan_count = 0 #Total number of sweeps written.
+    scan_dropped = 0 #Sweeps overwritten before they were read.
+
+    #Edge Events
+    _edge_channels = None
 
     #I2C Communication
     def _read_2bytes(self, reg_addr):
@@ -40,7 +131,8 @@ class IOPort:
         buffer = self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 2)
         return buffer
 
-    def __init__(self, d1In, d2In, d3In, d4In):
+    def __init__(self, d1In, d2In, d3In, d4In, bus_number = Turta_I2CBus.DEFAULT_BUS_NUMBER):
+        self.bus = Turta_I2CBus.get_bus(bus_number)
         GPIO.setwarnings(False)
         GPIO.setmode(GPIO.BCM)
 
@@ -68,9 +160,20 @@ class IOPort:
             GPIO.setup(self.d4, GPIO.OUT)
             GPIO.output(self.d4, GPIO.LOW)
 
+        self.channel_inputs = [ d1In, d2In, d3In, d4In ]
+        self._edge_channels = { }
         self.is_initialized = True
         return
 
+    def _get_pin(self, ch):
+        """Returns the GPIO pin of the channel.
+        :param ch: IO Channel.
+        """
+        if ch not in (1, 2, 3, 4):
+            raise ValueError("Channel must be 1 to 4.")
+
+        return [ self.d1, self.d2, self.d3, self.d4 ][ch - 1]
+
     #Digital Output Control
     def set_digital(self, ch, st):
         """Sets the digital output state.
@@ -104,27 +207,272 @@ class IOPort:
         else:
             return 0
 
+    #Digital Input Edge Events
+    def start_edge_events(self, ch, edge = EDGE.RISING, debounce_time = 0, on_rising = None, on_falling = None, window = 16):
+        """Starts detecting the edges of a digital input and counting its pulses.
+        Pulses are counted on rising edges, or on falling edges if only those are detected.
+        Edges are stamped with time.monotonic_ns() when the callback runs.
+        :param ch: IO Channel. Must be configured as input.
+        :param edge: Detected edges.
+        :param debounce_time: Edges closer than this to the last accepted edge are ignored, in us. 0 to disable.
+        :param on_rising: Function to call with the channel and timestamp on rising edges.
+        :param on_falling: Function to call with the channel and timestamp on falling edges.
+        :param window: Number of last pulses used for frequency and period estimation.
+        """
+        pin = self._get_pin(ch)
+        if not self.channel_inputs[ch - 1]:
+            raise ValueError("Channel is not configured as input.")
+        if ch in self._edge_channels:
+            raise RuntimeError("Edge events are already running on the channel.")
+
+        state = {
+            "edge": edge,
+            "debounce": int(debounce_time * 1000),
+            "on_rising": on_rising,
+            "on_falling": on_falling,
+            "counter": PulseCounter(window),
+            "last_time": None,
+            "last_level": GPIO.input(pin) }
+        self._edge_channels[ch] = state
+
+        gpioEdge = { EDGE.RISING: GPIO.RISING, EDGE.FALLING: GPIO.FALLING, EDGE.BOTH: GPIO.BOTH }[EDGE(edge)]
+        GPIO.add_event_detect(pin, gpioEdge, callback = lambda channel: self._handle_edge(ch, state))
+
+    def stop_edge_events(self, ch):
+        """Stops detecting the edges of a digital input and releases its pulse counter.
+        :param ch: IO Channel.
+        """
+        if ch not in self._edge_channels:
+            return
+
+        GPIO.remove_event_detect(self._get_pin(ch))
+        del self._edge_channels[ch]
+
+    def _handle_edge(self, ch, state):
+        """Debounces, counts and dispatches an edge.
+        :param ch: IO Channel.
+        :param state: Edge detection state of the channel.
+        """
+        timestamp = time.monotonic_ns()
+
+        #On single edge detection the level is known, otherwise it is read back.
+        edge = state["edge"]
+        if edge == EDGE.RISING:
+            level = 1
+        elif edge == EDGE.FALLING:
+            level = 0
+        else:
+            level = GPIO.input(self._get_pin(ch))
+            if level == state["last_level"]:
+                return
+
+        lastTime = state["last_time"]
+        if lastTime is not None and timestamp - lastTime < state["debounce"]:
+            return
+
+        state["last_time"] = timestamp
+        state["last_level"] = level
+
+        if level:
+            if edge != EDGE.FALLING:
+                state["counter"].add(timestamp)
+            if state["on_rising"] is not None:
+                state["on_rising"](ch, timestamp)
+        else:
+            if edge == EDGE.FALLING:
+                state["counter"].add(timestamp)
+            if state["on_falling"] is not None:
+                state["on_falling"](ch, timestamp)
+
+    def get_pulse_counter(self, ch):
+        """Returns the pulse counter of a channel with edge events, or None.
+        :param ch: IO Channel.
+        """
+        state = self._edge_channels.get(ch)
+        return None if state is None else state["counter"]
+
+    def read_pulse_count(self, ch):
+        """Reads the number of pulses counted since edge events started or the counter was reset.
+        :param ch: IO Channel.
+        """
+        counter = self.get_pulse_counter(ch)
+        return 0 if counter is None else counter.count
+
+    def read_pulse_frequency(self, ch):
+        """Estimates the pulse frequency in Hz over the last pulses.
+        :param ch: IO Channel.
+        """
+        counter = self.get_pulse_counter(ch)
+        return 0.0 if counter is None else counter.get_frequency()
+
+    def read_pulse_period(self, ch):
+        """Estimates the pulse period in s over the last pulses. Returns None until two pulses are counted.
+        :param ch: IO Channel.
+        """
+        counter = self.get_pulse_counter(ch)
+        return None if counter is None else counter.get_period()
+
+    def reset_pulse_count(self, ch):
+        """Clears the pulse count and history of a channel.
+        :param ch: IO Channel.
+        """
+        counter = self.get_pulse_counter(ch)
+        if counter is not None:
+            counter.reset()
+
     #Analog Input Readout
     def read_analog(self, ch):
         """Reads the analog input.
         :param ch: IO Channel.
         """
-        if (ch == 1):
-            dtemp = self._read_2bytes(self.MCU_ANALOGIN_CH1)
-        elif (ch == 2):
-            dtemp = self._read_2bytes(self.MCU_ANALOGIN_CH2)
-        elif (ch == 3):
-            dtemp = self._read_2bytes(self.MCU_ANALOGIN_CH3)
-        elif (ch == 4):
-            dtemp = self._read_2bytes(self.MCU_ANALOGIN_CH4)
-        else:
+        reg_addr = self.const_analog_registers.get(ch)
+        if reg_addr is None:
             return 0
 
-        return float((((dtemp[1] % 128) << 8) + (dtemp[0] % 256)) / 1023.0)
+        return float(self._read_analog_code(reg_addr) / self.ANALOG_MAX_CODE)
+
+    def _read_analog_code(self, reg_addr):
+        """Reads the raw 10-bit analog input code.
+        :param reg_addr: Analog input register address.
+        """
+        dtemp = self._read_2bytes(reg_addr)
+        return ((dtemp[1] % 128) << 8) + (dtemp[0] % 256)
+
+    #Analog Input Scan
+    def start_analog_scan(self, rate, capacity = 1024):
+        """Starts reading all four analog inputs at a fixed rate in a background thread.
+        Each sweep gets a time.monotonic_ns() timestamp, raw codes are kept in a ring buffer.
+        :param rate: Sweep rate in Hz.
+        :param capacity: Ring buffer size in sweeps.
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        if self._scan_worker is not None and self._scan_worker.running:
+            raise RuntimeError("Analog scan is already running.")
+
+        self.scan_timestamps = array('q', [ 0 ]) * capacity
+        self.scan_codes = array('H', [ 0 ]) * (capacity * 4)
+        self.scan_count = 0
+        self.scan_dropped = 0
+        self._scan_cursor = 0
+        self._scan_lock = threading.Lock()
+        self._scan_worker = Turta_Scheduling.PeriodicWorker(self._read_sweep, 1.0 / rate)
+        self._scan_worker.start()
+
+    def stop_analog_scan(self):
+        """Stops the background scan. The ring buffer keeps its sweeps."""
+        if self._scan_worker is not None:
+            self._scan_worker.stop()
+
+    def is_scanning(self):
+        """Returns True if the background scan is running.
+        Raises the error that stopped the scan, if any."""
+        return self._scan_worker is not None and self._scan_worker.is_running()
+
+    @property
+    def scan_overruns(self):
+        """Sweep slots missed because scanning fell behind."""
+        return self._scan_worker.overruns if self._scan_worker is not None else 0
+
+    def _read_sweep(self):
+        """Reads one sweep of all channels into the ring buffer. Runs on the scan thread."""
+        #Hold the bus, so the channels of a sweep are read back to back.
+        with self.bus:
+            timestamp = time.monotonic_ns()
+            sweep = [ self._read_analog_code(self.const_analog_registers[ch]) for ch in (1, 2, 3, 4) ]
+
+        #Readers never copy a sweep that is half written.
+        with self._scan_lock:
+            index = self.scan_count % len(self.scan_timestamps)
+            self.scan_timestamps[index] = timestamp
+            self.scan_codes[index * 4:(index + 1) * 4] = array('H', sweep)
+            self.scan_count += 1
+
+    def read_analog_scan(self, max_sweeps = None):
+        """Returns the unread sweeps as timestamps in ns and raw codes of channels 1 to 4 per sweep respectively.
+        Once all sweeps are read, raises the error that stopped the scan, if any.
+        :param max_sweeps: Maximum number of sweeps to read. None to read all.
+        """
+        timestamps = array('q')
+        codes = array('H')
+        if self.scan_timestamps is None:
+            return timestamps, codes
+
+        capacity = len(self.scan_timestamps)
+
+        #Copy under the ring lock, so the scan does not overwrite the sweeps being copied.
+        with self._scan_lock:
+            scanCount = self.scan_count
+
+            #Skip the sweeps that were overwritten since the last read.
+            if self._scan_cursor < scanCount - capacity:
+                self.scan_dropped += scanCount - capacity - self._scan_cursor
+                self._scan_cursor = scanCount - capacity
+
+            stop = scanCount if max_sweeps is None else min(scanCount, self._scan_cursor + max_sweeps)
+
+            while self._scan_cursor < stop:
+                index = self._scan_cursor % capacity
+                count = min(stop - self._scan_cursor, capacity - index)
+                timestamps.extend(self.scan_timestamps[index:index + count])
+                codes.extend(self.scan_codes[index * 4:(index + count) * 4])
+                self._scan_cursor += count
+
+        if not timestamps:
+            self._scan_worker.raise_error()
+
+        return timestamps, codes
+
+    def get_analog_scan_statistics(self):
+        """Calculates the achieved sweep rate in Hz and the jitter of the sweep interval in ms over the sweeps in the ring buffer.
+        Raises the error that stopped the scan, if any."""
+        if self._scan_worker is not None:
+            self._scan_worker.raise_error()
+
+        if self.scan_timestamps is None or self.scan_count < 3:
+            return AnalogScanStatistics(self.scan_count, 0.0, 0.0, self.scan_overruns, self.scan_dropped)
+
+        capacity = len(self.scan_timestamps)
+        with self._scan_lock:
+            scanCount = self.scan_count
+            first = max(0, scanCount - capacity)
+            stamps = [ self.scan_timestamps[i % capacity] for i in range(first, scanCount) ]
+        intervals = [ (b - a) / 1000000.0 for a, b in zip(stamps, stamps[1:]) ]
+
+        mean = sum(intervals) / len(intervals)
+        jitter = math.sqrt(sum((i - mean) ** 2 for i in intervals) / len(intervals))
+
+        return AnalogScanStatistics(scanCount, 1000.0 / mean if mean > 0 else 0.0, jitter, self.scan_overruns, self.scan_dropped)
+
+    def convert_to_volts(self, codes, reference_voltage = 3.3):
+        """Converts raw analog codes to volts in bulk. Returns an array('d').
+        NumPy is used for the conversion if it is installed.
+        :param codes: Raw analog codes, such as the codes of read_analog_scan.
+        :param reference_voltage: Voltage of the max code in V. Analog inputs measure 0V to 3.3V.
+        """
+        scale = reference_voltage / self.ANALOG_MAX_CODE
+
+        if np is not None:
+            #Typed arrays are converted without copying them into a list first.
+            if isinstance(codes, array):
+                codes = np.frombuffer(codes, dtype = np.dtype(codes.typecode))
+
+            #Write the results straight into the returned array.
+            volts = array('d', [ 0.0 ]) * len(codes)
+            np.multiply(codes, scale, out = np.frombuffer(volts, dtype = np.float64))
+            return volts
+
+        return array('d', [ code * scale for code in codes ])
 
     #Disposal
     def __del__(self):
         """Releases the resources."""
+        self.stop_analog_scan()
+
+        if self._edge_channels:
+            for ch in list(self._edge_channels):
+                self.stop_edge_events(ch)
+
         if self.is_initialized:
             GPIO.cleanup()
             del self.is_initialized
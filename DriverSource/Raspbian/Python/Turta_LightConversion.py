@@ -0,0 +1,66 @@
+# Turta IoT HAT Helper for Raspbian
+# Distributed under the terms of the MIT license.
+
+# Python Lux and Color Temperature Conversion for Broadcom / Avago APDS-9960 Sensor
+# Version 1.00
+# Updated: October 18th, 2026
+
+# Visit https://docs.turta.io for documentation.
+
+# Converts clear, red, green and blue counts to illuminance and correlated color temperature
+# with the coefficients of the DN40 application note. Works on NumPy arrays of recorded counts
+# and on single readings.
+
+import numpy as np
+
+#DN40 Coefficients
+DEVICE_FACTOR = 310.0
+R_COEFFICIENT = 0.136
+G_COEFFICIENT = 1.0
+B_COEFFICIENT = -0.444
+CT_COEFFICIENT = 3810.0
+CT_OFFSET = 1391.0
+
+#Integration time of one ALS cycle in ms.
+CYCLE_TIME = 2.78
+
+def calculate_lux_and_cct(clear, red, green, blue, gain, integration_time, glass_attenuation = 1.0):
+    """Calculates illuminance in lux and correlated color temperature in Kelvin respectively.
+    Readings where the clear channel is saturated, or with no red light, give NaN.
+    Returns floats for single readings and arrays for arrays.
+    :param clear: Clear channel counts.
+    :param red: Red channel counts.
+    :param green: Green channel counts.
+    :param blue: Blue channel counts.
+    :param gain: ALS and color gain setting, a CONTROL_AGAIN value.
+    :param integration_time: Integration time in ms.
+    :param glass_attenuation: Light transmission loss of a cover glass. 1 for open air.
+    """
+    clear = np.asarray(clear, dtype = np.float64)
+    red = np.asarray(red, dtype = np.float64)
+    green = np.asarray(green, dtype = np.float64)
+    blue = np.asarray(blue, dtype = np.float64)
+
+    #Remove the IR content from all channels.
+    ir = (red + green + blue - clear) / 2.0
+    redIR = red - ir
+    greenIR = green - ir
+    blueIR = blue - ir
+
+    #Counts per lux.
+    cpl = (integration_time * (4 ** int(gain))) / (glass_attenuation * DEVICE_FACTOR)
+    lux = np.maximum((R_COEFFICIENT * redIR + G_COEFFICIENT * greenIR + B_COEFFICIENT * blueIR) / cpl, 0.0)
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        cct = np.where(redIR > 0.0, CT_COEFFICIENT * blueIR / redIR + CT_OFFSET, np.nan)
+
+    #Saturated readings do not have a valid IR estimate.
+    maxCount = min(65535.0, 1025.0 * round(integration_time / CYCLE_TIME))
+    saturated = clear >= maxCount
+    lux = np.where(saturated, np.nan, lux)
+    cct = np.where(saturated, np.nan, cct)
+
+    if lux.ndim == 0:
+        return float(lux), float(cct)
+
+    return lux, cct
@@ -2,14 +2,198 @@
 # Distributed under the terms of the MIT license.
 
 # Python Driver for NXP MMA8491Q 3-Axis Accelerometer & Tilt Sensor
-# Version 1.02
-# Updated: June 25th, 2019
+# Version 1.03
+# Updated: October 18th, 2026
 
 # Visit https://docs.turta.io for documentation.
 
 import time
+import queue
+import threading
+from array import array
+from collections import namedtuple
 import RPi.GPIO as GPIO
-from smbus import SMBus
+from . import Turta_I2CBus, Turta_Scheduling
+
+#Sample Buffer
+
+SampleBlock = namedtuple("SampleBlock", [ "index", "timestamps", "xyz" ])
+
+class SampleRingBuffer:
+    """Timestamped XYZ Sample Ring Buffer
+    Preallocated storage for raw 14-bit X, Y and Z-axis samples with monotonic_ns timestamps.
+    One writer appends samples, any number of readers follow it with their own cursors."""
+
+    def __init__(self, capacity):
+        """Allocates the buffer.
+        :param capacity: Number of samples to keep.
+        """
+        if capacity < 1:
+            raise ValueError("Capacity must be at least one sample.")
+
+        self.capacity = capacity
+        self.timestamps = array('q', [ 0 ]) * capacity
+        self.xyz = array('h', [ 0 ]) * (capacity * 3)
+        self.write_count = 0 #Total number of samples written.
+        self._timestamps_view = memoryview(self.timestamps)
+        self._xyz_view = memoryview(self.xyz)
+
+    def append(self, timestamp, x, y, z):
+        """Writes a sample, overwriting the oldest one when the buffer is full.
+        :param timestamp: Sample time in ns from time.monotonic_ns().
+        :param x: X-axis raw value.
+        :param y: Y-axis raw value.
+        :param z: Z-axis raw value.
+        """
+        index = self.write_count % self.capacity
+        self.timestamps[index] = timestamp
+        self.xyz[index * 3] = x
+        self.xyz[index * 3 + 1] = y
+        self.xyz[index * 3 + 2] = z
+
+        #Publish the sample after its data is in place.
+        self.write_count += 1
+
+    def get_blocks(self, start, stop):
+        """Returns the samples between two sample numbers as one or two blocks, split where the buffer wraps around.
+        Blocks are memoryviews into the buffer, so they are only valid until the writer overwrites them.
+        :param start: First sample number, counted from the first sample ever written.
+        :param stop: Sample number after the last sample.
+        """
+        start = max(start, self.write_count - self.capacity, 0)
+        blocks = []
+
+        while start < stop:
+            index = start % self.capacity
+            count = min(stop - start, self.capacity - index)
+            blocks.append(SampleBlock(start, self._timestamps_view[index:index + count], self._xyz_view[index * 3:(index + count) * 3]))
+            start += count
+
+        return blocks
+
+    def create_reader(self, from_oldest = False):
+        """Creates a reader with its own cursor.
+        :param from_oldest: True to start from the oldest sample in the buffer, False to start from the next sample.
+        """
+        return SampleReader(self, max(0, self.write_count - self.capacity) if from_oldest else self.write_count)
+
+class SampleReader:
+    """Sample Ring Buffer Reader
+    Follows the writer with an independent cursor and hands out blocks without copying."""
+
+    def __init__(self, buffer, cursor):
+        """Initiates the reader.
+        :param buffer: Sample ring buffer.
+        :param cursor: Number of the next sample to read.
+        """
+        self.buffer = buffer
+        self.cursor = cursor
+        self.dropped = 0 #Samples overwritten before they were read.
+
+    def available(self):
+        """Returns the number of unread samples."""
+        return min(self.buffer.write_count - self.cursor, self.buffer.capacity)
+
+    def read(self, max_samples = None):
+        """Reads the unread samples as one or two blocks and advances the cursor.
+        Process the blocks before the writer laps the buffer, or copy them.
+        :param max_samples: Maximum number of samples to read. None to read all.
+        """
+        writeCount = self.buffer.write_count
+
+        #Skip the samples that were overwritten since the last read.
+        oldest = writeCount - self.buffer.capacity
+        if self.cursor < oldest:
+            self.dropped += oldest - self.cursor
+            self.cursor = oldest
+
+        stop = writeCount if max_samples is None else min(writeCount, self.cursor + max_samples)
+        blocks = self.buffer.get_blocks(self.cursor, stop)
+        self.cursor = stop
+
+        return blocks
+
+#Tilt Events
+
+TiltEvent = namedtuple("TiltEvent", [ "timestamp", "tilted" ])
+
+#Shock Capture
+
+ShockEvent = namedtuple("ShockEvent", [ "timestamp", "peak", "timestamps", "xyz" ])
+
+class ShockCapture:
+    """Shock Event Capture
+    Watches a sample ring buffer for acceleration magnitudes above a threshold, and copies the samples
+    from the pre-trigger time before to the post-trigger time after each trigger into a ShockEvent.
+    The ring buffer must hold more than the pre and post-trigger times plus the update interval."""
+
+    def __init__(self, buffer, threshold, pre_trigger_time = 0.1, post_trigger_time = 0.4):
+        """Initiates the capture. Samples written before this call are only used as pre-trigger history.
+        :param buffer: Sample ring buffer of a streaming sensor.
+        :param threshold: Trigger threshold of the acceleration magnitude in G. 1G at rest.
+        :param pre_trigger_time: Captured time before the trigger in seconds.
+        :param post_trigger_time: Captured time after the trigger in seconds.
+        """
+        self.buffer = buffer
+        self.reader = buffer.create_reader()
+        self.pre_trigger_time = int(pre_trigger_time * 1000000000)
+        self.post_trigger_time = int(post_trigger_time * 1000000000)
+
+        #Compare squared magnitudes in raw counts, 1024 counts per G.
+        self._threshold_squared = (threshold * 1024.0) ** 2
+        self._trigger = None #Sample number, timestamp, post-trigger end and peak of the capture in progress.
+
+    def update(self):
+        """Processes the new samples and returns the completed captures."""
+        events = []
+
+        for block in self.reader.read():
+            xyz = block.xyz
+            for i in range(len(block.timestamps)):
+                timestamp = block.timestamps[i]
+                x = self._convert_to_counts(xyz[i * 3])
+                y = self._convert_to_counts(xyz[i * 3 + 1])
+                z = self._convert_to_counts(xyz[i * 3 + 2])
+                magnitudeSquared = x * x + y * y + z * z
+
+                if self._trigger is None:
+                    if magnitudeSquared > self._threshold_squared:
+                        self._trigger = [ block.index + i, timestamp, timestamp + self.post_trigger_time, magnitudeSquared ]
+                    continue
+
+                if magnitudeSquared > self._trigger[3]:
+                    self._trigger[3] = magnitudeSquared
+
+                if timestamp >= self._trigger[2]:
+                    events.append(self._freeze(block.index + i + 1))
+                    self._trigger = None
+
+        return events
+
+    def _convert_to_counts(self, analog_data):
+        """Converts raw sensor data to signed counts, same scale as MMA8491QSensor.
+        :param analog_data: Raw sensor output."""
+        return analog_data - 0x3FFF if (analog_data & 0x2000) == 0x2000 else analog_data
+
+    def _freeze(self, stop):
+        """Copies the samples of the completed capture.
+        :param stop: Sample number after the last post-trigger sample.
+        """
+        index, timestamp, postEnd, peak = self._trigger
+
+        #Walk back to the first sample in the pre-trigger time, or to the oldest one still in the buffer.
+        start = index
+        oldest = max(0, self.buffer.write_count - self.buffer.capacity)
+        while start > oldest and self.buffer.timestamps[(start - 1) % self.buffer.capacity] >= timestamp - self.pre_trigger_time:
+            start -= 1
+
+        timestamps = array('q')
+        xyz = array('h')
+        for block in self.buffer.get_blocks(start, stop):
+            timestamps.frombytes(block.timestamps.cast('B'))
+            xyz.frombytes(block.xyz.cast('B'))
+
+        return ShockEvent(timestamp, (peak ** 0.5) / 1024.0, timestamps, xyz)
 
 class MMA8491QSensor:
     "MMA8491Q Sensor"
@@ -26,8 +210,17 @@ class MMA8491QSensor:
     MMA8491Q_OUT_Y_MSB = 0x03
     MMA8491Q_OUT_Z_MSB = 0x05
 
-    #I2C Config
-    bus = SMBus(1)
+    #Timing
+    MMA8491Q_TURN_ON_TIME = 0.0009 #Enable to data ready time in seconds.
+
+    #Streaming
+    _stream_worker = None
+    stream_buffer = None
+
+    #Tilt Watch
+    _tilt_worker = None
+    _tilt_events = None
+    tilt_state = None #Last tilt state seen by the watch, None before the first check.
 
     #I2C Communication
 
@@ -53,8 +246,12 @@ class MMA8491QSensor:
 
     #Initialization
 
-    def __init__(self):
-        """Initiates the MMA8491Q sensor."""
+    def __init__(self, bus_number = Turta_I2CBus.DEFAULT_BUS_NUMBER):
+        """Initiates the MMA8491Q sensor.
+        :param bus_number: I2C bus number.
+        """
+        self.bus = Turta_I2CBus.get_bus(bus_number)
+        self._enable_lock = threading.Lock() #Held while the EN pin is high, so conversions do not overlap.
         GPIO.setwarnings(False)
         GPIO.setmode(GPIO.BCM)
         GPIO.setup(self.mma8491qEn, GPIO.OUT)
@@ -72,51 +269,26 @@ class MMA8491QSensor:
 
     def read_x_axis(self):
         """Reads the X-axis G value."""
-        GPIO.output(self.mma8491qEn, GPIO.HIGH)
-        time.sleep(0.001)
-
-        while ((self._read_register_1ubyte(self.MMA8491Q_STATUS) & 0x01) != 0x01):
-            time.sleep(0.001)
-        tempData = self._read_2bytes_as_ushort_rs2b(self.MMA8491Q_OUT_X_MSB)
-        GPIO.output(self.mma8491qEn, GPIO.LOW)
+        timestamp, tempData = self._run_conversion(0x01, lambda: self._read_2bytes_as_ushort_rs2b(self.MMA8491Q_OUT_X_MSB))
 
         return self._convert_to_g(tempData)
 
     def read_y_axis(self):
         """Reads the Y-axis G value."""
-        GPIO.output(self.mma8491qEn, GPIO.HIGH)
-        time.sleep(0.001)
-
-        while ((self._read_register_1ubyte(self.MMA8491Q_STATUS) & 0x02) != 0x02):
-            time.sleep(0.001)
-        tempData = self._read_2bytes_as_ushort_rs2b(self.MMA8491Q_OUT_Y_MSB)
-        GPIO.output(self.mma8491qEn, GPIO.LOW)
+        timestamp, tempData = self._run_conversion(0x02, lambda: self._read_2bytes_as_ushort_rs2b(self.MMA8491Q_OUT_Y_MSB))
 
         return self._convert_to_g(tempData)
 
     def read_z_axis(self):
         """Reads the Z-axis G value."""
-        GPIO.output(self.mma8491qEn, GPIO.HIGH)
-        time.sleep(0.001)
-
-        while ((self._read_register_1ubyte(self.MMA8491Q_STATUS) & 0x04) != 0x04):
-            time.sleep(0.001)
-        tempData = self._read_2bytes_as_ushort_rs2b(self.MMA8491Q_OUT_Z_MSB)
-        GPIO.output(self.mma8491qEn, GPIO.LOW)
+        timestamp, tempData = self._run_conversion(0x04, lambda: self._read_2bytes_as_ushort_rs2b(self.MMA8491Q_OUT_Z_MSB))
 
         return self._convert_to_g(tempData)
 
     def read_xyz_axis(self):
         """Reads the X, Y and Z-Axis G values respectively."""
         xyz = [ 0, 0, 0 ]
-
-        GPIO.output(self.mma8491qEn, GPIO.HIGH)
-        time.sleep(0.001)
-
-        while ((self._read_register_1ubyte(self.MMA8491Q_STATUS) & 0x08) != 0x08):
-            time.sleep(0.001)
-        xyzArray = self._read_6bytes_array(self.MMA8491Q_OUT_X_MSB)
-        GPIO.output(self.mma8491qEn, GPIO.LOW)
+        timestamp, xyzArray = self._run_conversion(0x08, lambda: self._read_6bytes_array(self.MMA8491Q_OUT_X_MSB))
 
         xyz[0] = self._convert_to_g((xyzArray[0] << 6) + (xyzArray[1] >> 2)) #X-Axis
         xyz[1] = self._convert_to_g((xyzArray[2] << 6) + (xyzArray[3] >> 2)) #Y-Axis
@@ -124,17 +296,180 @@ class MMA8491QSensor:
 
         return xyz
 
+    def _run_conversion(self, status_mask, read_output):
+        """Enables the sensor for one conversion and reads its output once the status bits are set.
+        Returns the enable time in ns and the output respectively. The bus is only held for the status and output reads.
+        :param status_mask: Data ready bits of the STATUS register.
+        :param read_output: Function that reads the output registers.
+        """
+        with self._enable_lock:
+            GPIO.output(self.mma8491qEn, GPIO.HIGH)
+            timestamp = time.monotonic_ns()
+
+            try:
+                time.sleep(self.MMA8491Q_TURN_ON_TIME)
+
+                while True:
+                    with self.bus:
+                        if (self._read_register_1ubyte(self.MMA8491Q_STATUS) & status_mask) == status_mask:
+                            return timestamp, read_output()
+                    time.sleep(0.0001)
+            finally:
+                GPIO.output(self.mma8491qEn, GPIO.LOW)
+
+    def _measure_xyz_raw(self):
+        """Runs one conversion and reads the raw X, Y and Z-axis values.
+        Returns the enable time in ns and the raw values respectively."""
+        timestamp, xyzArray = self._run_conversion(0x08, lambda: self._read_6bytes_array(self.MMA8491Q_OUT_X_MSB))
+
+        return (timestamp,
+            (xyzArray[0] << 6) + (xyzArray[1] >> 2),
+            (xyzArray[2] << 6) + (xyzArray[3] >> 2),
+            (xyzArray[4] << 6) + (xyzArray[5] >> 2))
+
     def read_tilt_state(self):
         """Reads the tilt state.
         Returns True if acceleration is > 0.688g or X/Y axis > 45. False if not."""
-        GPIO.output(self.mma8491qEn, GPIO.HIGH)
-        time.sleep(0.001)
-        state = False if GPIO.input(self.mma8491qInt) else True
-        GPIO.output(self.mma8491qEn, GPIO.LOW)
+        #The INT pin is a GPIO read, so only the EN pin is held, not the bus.
+        with self._enable_lock:
+            GPIO.output(self.mma8491qEn, GPIO.HIGH)
+            time.sleep(0.001)
+            state = False if GPIO.input(self.mma8491qInt) else True
+            GPIO.output(self.mma8491qEn, GPIO.LOW)
 
         return state
 
+    #Streaming
+
+    def start_streaming(self, rate, capacity = 4096):
+        """Starts sampling raw X, Y and Z-axis values at a fixed rate in a background thread.
+        Returns the ring buffer the samples are written to. Use create_reader() on it to consume the samples.
+        :param rate: Sample rate in Hz. Each sample takes about 1.5 ms, so rates above 500 Hz are not reached.
+        :param capacity: Ring buffer size in samples.
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        if self._stream_worker is not None and self._stream_worker.running:
+            raise RuntimeError("Streaming is already running.")
+
+        buffer = SampleRingBuffer(capacity)
+        self.stream_buffer = buffer
+        self._stream_worker = Turta_Scheduling.PeriodicWorker(lambda: buffer.append(*self._measure_xyz_raw()), 1.0 / rate)
+        self._stream_worker.start()
+
+        return buffer
+
+    def stop_streaming(self):
+        """Stops the background sampling. The ring buffer keeps its samples."""
+        if self._stream_worker is not None:
+            self._stream_worker.stop()
+
+    def is_streaming(self):
+        """Returns True if the background sampling is running.
+        Raises the error that stopped the sampling, if any."""
+        return self._stream_worker is not None and self._stream_worker.is_running()
+
+    @property
+    def stream_overruns(self):
+        """Sample slots missed because acquisition fell behind."""
+        return self._stream_worker.overruns if self._stream_worker is not None else 0
+
+    def read_shock_events(self, threshold, pre_trigger_time = 0.1, post_trigger_time = 0.4, interval = 0.05):
+        """Yields shock captures from the running stream until streaming stops.
+        :param threshold: Trigger threshold of the acceleration magnitude in G. 1G at rest.
+        :param pre_trigger_time: Captured time before the trigger in seconds.
+        :param post_trigger_time: Captured time after the trigger in seconds.
+        :param interval: Time between buffer checks in seconds.
+        """
+        if not self.is_streaming():
+            raise RuntimeError("Streaming is not running.")
+
+        worker = self._stream_worker
+        capture = ShockCapture(self.stream_buffer, threshold, pre_trigger_time, post_trigger_time)
+
+        while worker.running:
+            for event in capture.update():
+                yield event
+            time.sleep(interval)
+
+        worker.raise_error()
+
+    #Tilt Watch
+
+    def start_tilt_watch(self, interval = 0.1, on_tilt_enter = None, on_tilt_exit = None, queue_size = 64):
+        """Starts watching the tilt output in a background thread.
+        The sensor is enabled for about 1 ms per check and the watch does not use the I2C bus.
+        :param interval: Time between checks in seconds.
+        :param on_tilt_enter: Function called with the event when a tilt starts. Runs on the watch thread.
+        :param on_tilt_exit: Function called with the event when a tilt ends. Runs on the watch thread.
+        :param queue_size: Number of events kept for read_tilt_events. Oldest events are dropped when full.
+        """
+        if interval <= 0:
+            raise ValueError("Interval must be positive.")
+        if self._tilt_worker is not None and self._tilt_worker.running:
+            raise RuntimeError("Tilt watch is already running.")
+
+        self.tilt_state = None
+        self._tilt_events = queue.Queue(queue_size)
+        self._tilt_worker = Turta_Scheduling.PeriodicWorker(lambda: self._check_tilt(on_tilt_enter, on_tilt_exit), interval)
+        self._tilt_worker.start()
+
+    def stop_tilt_watch(self):
+        """Stops watching the tilt output."""
+        if self._tilt_worker is not None:
+            self._tilt_worker.stop()
+
+    def is_tilt_watching(self):
+        """Returns True if the tilt watch is running.
+        Raises the error that stopped the watch, if any."""
+        return self._tilt_worker is not None and self._tilt_worker.is_running()
+
+    def read_tilt_events(self, timeout = None):
+        """Yields tilt events as they happen. Ends when the watch stops, or when no event arrives within the timeout.
+        Raises the error that stopped the watch, if any.
+        :param timeout: Maximum wait for an event in seconds. None to wait until the watch stops.
+        """
+        events = self._tilt_events
+        worker = self._tilt_worker
+        if events is None:
+            return
+
+        while True:
+            try:
+                #Wake up regularly to notice a stopped watch.
+                event = events.get(timeout = 0.5 if timeout is None else timeout)
+            except queue.Empty:
+                worker.raise_error()
+                if timeout is not None or not worker.running:
+                    return
+                continue
+            yield event
+
+    def _check_tilt(self, on_tilt_enter, on_tilt_exit):
+        """Checks the tilt output once and reports a change. Runs on the watch thread.
+        :param on_tilt_enter: Tilt start callback.
+        :param on_tilt_exit: Tilt end callback.
+        """
+        tilted = self.read_tilt_state()
+
+        #Report changes only. A tilt that is present at start is reported as a tilt start.
+        if tilted != bool(self.tilt_state):
+            event = TiltEvent(time.monotonic_ns(), tilted)
+
+            try:
+                self._tilt_events.put_nowait(event)
+            except queue.Full:
+                self._tilt_events.get_nowait()
+                self._tilt_events.put_nowait(event)
+
+            callback = on_tilt_enter if tilted else on_tilt_exit
+            if callback is not None:
+                callback(event)
+
+        self.tilt_state = tilted
+
     #Disposal
     def __del__(self):
         """Releases the resources."""
-        return
+        self.stop_tilt_watch()
+        self.stop_streaming()
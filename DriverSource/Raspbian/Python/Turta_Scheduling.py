@@ -0,0 +1,116 @@
+# Turta IoT HAT Helper for Raspbian
+# Distributed under the terms of the MIT license.
+
+# Python Periodic Task Scheduling
+# Version 1.00
+# Updated: October 18th, 2026
+
+# Visit https://docs.turta.io for documentation.
+
+# Fixed rate schedule and background worker shared by the sampling loops of the sensor helpers.
+
+import time
+import threading
+
+class FixedRateSchedule:
+    """Fixed Rate Schedule
+    Keeps the deadlines on multiples of the period from the start, so the rate does not drift with the time spent on each task.
+    Deadlines that are already past are skipped and counted as overruns."""
+
+    def __init__(self, period):
+        """Starts the schedule now.
+        :param period: Time between deadlines in seconds.
+        """
+        if period <= 0:
+            raise ValueError("Period must be greater than zero.")
+
+        self.period = int(period * 1000000000) #Period in ns.
+        self.overruns = 0 #Deadlines skipped because the task fell behind.
+        self._deadline = time.monotonic_ns()
+
+    def advance(self):
+        """Moves to the next deadline and returns the time until it in seconds."""
+        self._deadline += self.period
+        now = time.monotonic_ns()
+
+        if now > self._deadline:
+            missed = (now - self._deadline) // self.period + 1
+            self.overruns += missed
+            self._deadline += missed * self.period
+
+        return (self._deadline - now) / 1000000000.0
+
+class PeriodicWorker:
+    """Periodic Background Worker
+    Calls a function on a fixed rate schedule in a daemon thread until stopped or until the function raises.
+    The error that stopped the worker is kept and raised to the consumer once."""
+
+    def __init__(self, function, period):
+        """Initiates the worker without starting it.
+        :param function: Function to call, without arguments.
+        :param period: Time between calls in seconds.
+        """
+        if period <= 0:
+            raise ValueError("Period must be greater than zero.")
+
+        self.function = function
+        self.period = period
+        self.schedule = None
+        self.running = False
+        self._error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def overruns(self):
+        """Calls skipped because the function fell behind the schedule."""
+        return self.schedule.overruns if self.schedule is not None else 0
+
+    def start(self):
+        """Starts calling the function in a background thread."""
+        if self.running:
+            raise RuntimeError("Worker is already running.")
+
+        self._error = None
+        self._stop.clear()
+        self.schedule = FixedRateSchedule(self.period)
+        self.running = True
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the worker and waits for the call in progress to return."""
+        thread = self._thread
+        if thread is None:
+            return
+
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+        self.running = False
+
+    def is_running(self):
+        """Returns True if the worker is running.
+        Raises the error that stopped the worker, if any."""
+        self.raise_error()
+        return self.running
+
+    def raise_error(self):
+        """Raises the error that stopped the worker, once."""
+        error = self._error
+        if error is not None:
+            self._error = None
+            raise error
+
+    def _run(self):
+        """Calls the function on schedule until stopped or until it raises."""
+        try:
+            while not self._stop.is_set():
+                self.function()
+                self._stop.wait(self.schedule.advance())
+        except Exception as e:
+            #Keep the error for the consumer before the worker shows as stopped.
+            self._error = e
+
+        self.running = False
@@ -2,14 +2,15 @@
 # Distributed under the terms of the MIT license.
 
 # Python Driver for Vishay VEML6075 UV Light Sensor
-# Version 1.01
-# Updated: July 14th, 2018
+# Version 1.02
+# Updated: October 18th, 2026
 
 # Visit https://docs.turta.io for documentation.
 
 import time
+from collections import namedtuple
 from enum import IntEnum
-from smbus import SMBus
+from . import Turta_I2CBus, Turta_Scheduling
 
 #Enumerations
 
@@ -36,6 +37,14 @@ class PowerMode(IntEnum):
     PowerOn = 0b00000000
     ShutDown = 0b00000001
 
+#Snapshots
+#Raw channel counts depend on the integration time and dynamic setting. Compensated values are scaled
+#to the 800ms integration time and high dynamic reference range, so they and the UV indexes do not.
+
+UVSnapshot = namedtuple("UVSnapshot", [
+    "uva", "uvd", "uvb", "uvcomp1", "uvcomp2",
+    "uva_compensated", "uvb_compensated", "uv_index_a", "uv_index_b", "uv_index" ])
+
 class VEML6075Sensor:
     """VEML6075 Sensor"""
 
@@ -56,15 +65,41 @@ class VEML6075Sensor:
     uva_b_coef = 1.33 #VA IR Coefficient
     uvb_c_coef = 2.95 #UVB VIS Coefficient
     uvb_d_coef = 1.74 #UVB IR Coefficient
-    uva_resp = 0.001461 #UVA Responsivity
-    uvb_resp = 0.002591 #UVB Responsivity
+    uva_resp = 0.001461 #UVA Responsivity, for 800ms integration time and high dynamic.
+    uvb_resp = 0.002591 #UVB Responsivity, for 800ms integration time and high dynamic.
+
+    #Range Scale: Multiplier from counts of the range in use to counts of the reference range.
+    _range_scale = 1.0
 
     #Correction Factors
     k1 = 0
     k2 = 0
 
-    #I2C Config
-    bus = SMBus(1)
+    #Data: Integration times in ms
+    const_integration_times = {
+        IntegrationTime.IT_050ms: 50.0,
+        IntegrationTime.IT_100ms: 100.0,
+        IntegrationTime.IT_200ms: 200.0,
+        IntegrationTime.IT_400ms: 400.0,
+        IntegrationTime.IT_800ms: 800.0 }
+
+    #Active Force Timing
+    active_force_margin = 0.1 #Extra wait as a share of the integration time, covers the oscillator tolerance.
+
+    #Data: Auto range steps from the least to the most sensitive, as integration time and dynamic setting.
+    #High dynamic halves the sensitivity, so it is only used where a shorter integration time is not available.
+    const_auto_ranges = [
+        (IntegrationTime.IT_050ms, DynamicSetting.High),
+        (IntegrationTime.IT_050ms, DynamicSetting.Normal),
+        (IntegrationTime.IT_100ms, DynamicSetting.Normal),
+        (IntegrationTime.IT_200ms, DynamicSetting.Normal),
+        (IntegrationTime.IT_400ms, DynamicSetting.Normal),
+        (IntegrationTime.IT_800ms, DynamicSetting.Normal) ]
+
+    #Auto Range Limits
+    auto_range_high_level = 0.9 #Share of the full scale where the range steps down.
+    auto_range_low_level = 0.4 #Share of the full scale the expected count must stay under to step up.
+    full_scale = 65535
 
     #I2C Communication
 
@@ -75,21 +110,17 @@ class VEML6075Sensor:
         """
         self.bus.write_i2c_block_data(self.I2C_ADDRESS, reg_addr, data)
 
-    def _read_2bytes_as_ushort_lsbfirst(self, reg_addr):
-        """Reads data from the I2C device.
-        :param reg_addr: Read register address.
-        """
-        buffer = self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 2)
-        return buffer[0] + (buffer[1] << 8)
-
     def _read_2bytes_array(self, reg_addr):
         """Reads data from the I2C device.
         :param reg_addr: Read register address.
         """
         return self.bus.read_i2c_block_data(self.I2C_ADDRESS, reg_addr, 2)
 
-    def __init__(self):
-        """Initiates the VEML6075 sensor to get UVA, UVB and UVIndex."""
+    def __init__(self, bus_number = Turta_I2CBus.DEFAULT_BUS_NUMBER):
+        """Initiates the VEML6075 sensor to get UVA, UVB and UVIndex.
+        :param bus_number: I2C bus number.
+        """
+        self.bus = Turta_I2CBus.get_bus(bus_number)
         self.config(
             IntegrationTime.IT_800ms,
             DynamicSetting.High,
@@ -113,113 +144,187 @@ class VEML6075Sensor:
 
         self._write_register_2bytes_array(self.VEML6075_UV_CONF, [config_command, 0x00])
 
-    #Sensor Readouts
+        self.integration_time = integration_time
+        self.dynamic_setting = dynamic_setting
+        self.active_force_mode = active_force_mode
+        self.power_mode = power_mode
 
-    def _trigger_one_measurement(self):
-        """Triggers one time measurement for Active Force Mode enabled scenarios."""
-        tempConfig = self._read_2bytes_array(self.VEML6075_UV_CONF)
+        #Compensated values are scaled to the reference range, so they and the UV indexes do not depend on the range.
+        #The a, b, c and d coefficients are channel ratios, they do not depend on the range.
+        self._range_scale = self._get_sensitivity(IntegrationTime.IT_800ms, DynamicSetting.High) / \
+            self._get_sensitivity(integration_time, dynamic_setting)
 
-        tempConfig[0] |= 0b00000100
-
-        self._write_register_2bytes_array(self.VEML6075_UV_CONF, tempConfig)
+    def _get_sensitivity(self, integration_time, dynamic_setting):
+        """Returns the relative count sensitivity of a range.
+        :param integration_time: UV integration time.
+        :param dynamic_setting: Dynamic setting.
+        """
+        return self.const_integration_times[integration_time] * (1.0 if dynamic_setting == DynamicSetting.High else 2.0)
 
-    def _read_raw_uva(self):
-        """Reads RAW UVA."""
-        return float(self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVA_DATA))
+    #Sensor Readouts
 
-    def _read_raw_uvb(self):
-        """Reads RAW UVB."""
-        return float(self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVB_DATA))
+    def _trigger_one_measurement(self):
+        """Triggers one time measurement for Active Force Mode enabled scenarios."""
+        with self.bus:
+            tempConfig = self._read_2bytes_array(self.VEML6075_UV_CONF)
+
+            tempConfig[0] |= 0b00000100
+
+            self._write_register_2bytes_array(self.VEML6075_UV_CONF, tempConfig)
+
+    def read_snapshot(self):
+        """Reads all channels while holding the bus and calculates the compensated values and UV indexes from the same data."""
+        #Each channel is a separate 16-bit register, LSB first.
+        with self.bus:
+            uva = self.bus.read_word_data(self.I2C_ADDRESS, self.VEML6075_UVA_DATA)
+            uvd = self.bus.read_word_data(self.I2C_ADDRESS, self.VEML6075_DUMMY)
+            uvb = self.bus.read_word_data(self.I2C_ADDRESS, self.VEML6075_UVB_DATA)
+            uvcomp1 = self.bus.read_word_data(self.I2C_ADDRESS, self.VEML6075_UVCOMP1_DATA)
+            uvcomp2 = self.bus.read_word_data(self.I2C_ADDRESS, self.VEML6075_UVCOMP2_DATA)
+
+        return self._calculate_snapshot(uva, uvd, uvb, uvcomp1, uvcomp2)
+
+    def _calculate_snapshot(self, uva, uvd, uvb, uvcomp1, uvcomp2):
+        """Calculates the compensated values in reference range counts and UV indexes.
+        :param uva: Raw UVA.
+        :param uvd: Raw UVD.
+        :param uvb: Raw UVB.
+        :param uvcomp1: Raw visible noise compensation.
+        :param uvcomp2: Raw infrared noise compensation.
+        """
+        #Formulas:
+        #UVAcalc = UVA - a x UVcomp1 - b x UVcomp2
+        #UVBcalc = UVB - c x UVcomp1 - d x UVcomp2
+        #UVIA = UVAcalc x k1 x UVAresponsivity
+        #UVIB = UVBcalc x k2 x UVBresponsivity
+        uVAcalc = (uva - self.uva_a_coef * uvcomp1 - self.uva_b_coef * uvcomp2) * self._range_scale
+        uVBcalc = (uvb - self.uvb_c_coef * uvcomp1 - self.uvb_d_coef * uvcomp2) * self._range_scale
+        uVIA = uVAcalc * self.k1 * self.uva_resp
+        uVIB = uVBcalc * self.k2 * self.uvb_resp
 
-    def _read_raw_uvd(self):
-        """Reads RAW UVD."""
-        return float(self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_DUMMY))
+        #Formulas:
+        #UVAcomp = (UVA - UVD) - a * (UVcomp1 - UVD) - b * (UVcomp2 - UVD)
+        #UVBcomp = (UVB - UVD) - c * (UVcomp1 - UVD) - d * (UVcomp2 - UVD)
+        #UVI = ((UVBcomp * UVBresp) + (UVAcomp * UVAresp)) / 2
+        uVAcomp = ((uva - uvd) - self.uva_a_coef * (uvcomp1 - uvd) - self.uva_b_coef * (uvcomp2 - uvd)) * self._range_scale
+        uVBcomp = ((uvb - uvd) - self.uvb_c_coef * (uvcomp1 - uvd) - self.uvb_d_coef * (uvcomp2 - uvd)) * self._range_scale
+        uVI = ((uVBcomp * self.uvb_resp) + (uVAcomp * self.uva_resp)) / 2
 
-    def _read_raw_uvcomp1(self):
-        """Reads Noise Compensation Channel 1 data which allows only visible noise to pass through."""
-        return float(self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP1_DATA))
+        if uVI < 0:
+            uVI = 0
 
-    def _read_raw_uvcomp2(self):
-        """Reads Noise Compensation Channel 2 data which allows only infrared noise to pass through."""
-        return float(self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP2_DATA))
+        return UVSnapshot(
+            uva, uvd, uvb, uvcomp1, uvcomp2,
+            float(uVAcalc), float(uVBcalc), float(uVIA), float(uVIB), float(uVI))
 
     def calculate_compensated_uva(self):
         """Calculates Compensated UVA."""
-        #Formula:
-        #UVAcalc = UVA - a x UVcomp1 - b x UVcomp2
-
-        uva = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVA_DATA)
-        uvcomp1 = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP1_DATA)
-        uvcomp2 = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP2_DATA)
-
-        uVAcalc = uva - self.uva_a_coef * uvcomp1 - self.uva_b_coef * uvcomp2
-
-        return float(uVAcalc)
+        return self.read_snapshot().uva_compensated
 
     def calculate_compensated_uvb(self):
         """Calculates Compensated UVB."""
-        #Formula:
-        #UVBcalc = UVB - c x UVcomp1 - d x UVcomp2
-
-        uvb = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVB_DATA)
-        uvcomp1 = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP1_DATA)
-        uvcomp2 = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP2_DATA)
-
-        uVBcalc = uvb - self.uvb_c_coef * uvcomp1 - self.uvb_d_coef * uvcomp2
-
-        return float(uVBcalc)
+        return self.read_snapshot().uvb_compensated
 
     def calculate_uv_index_a(self):
         """Calculates the UV Index A."""
-        #Formula:
-        #UVIA = UVAcalc x k1 x UVAresponsivity
-
-        uva = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVA_DATA)
-        uvcomp1 = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP1_DATA)
-        uvcomp2 = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP2_DATA)
+        return self.read_snapshot().uv_index_a
 
-        uVAcalc = uva - self.uva_a_coef * uvcomp1 - self.uva_b_coef * uvcomp2
+    def calculate_uv_index_b(self):
+        """Calculates the UV Index B."""
+        return self.read_snapshot().uv_index_b
 
-        uVIA = uVAcalc * self.k1 * self.uva_resp
+    def calculate_average_uv_index(self):
+        """Calculates the Average UV Index."""
+        return self.read_snapshot().uv_index
 
-        return float(uVIA)
+    #Low Power Sampling
 
-    def calculate_uv_index_b(self):
-        """Calculates the UV Index B."""
-        #Formula:
-        #UVIB = UVBcalc x k2 x UVBresponsivity
+    def read_forced_snapshot(self):
+        """Powers the sensor on, runs one active force measurement, reads it and shuts the sensor down.
+        Takes the integration time plus margin. Uses the integration time and dynamic setting in use."""
+        #Power on and trigger in one write.
+        self.config(
+            self.integration_time,
+            self.dynamic_setting,
+            Trigger.TriggerOneMeasurement,
+            ActiveForceMode.ActiveForceMode,
+            PowerMode.PowerOn)
 
-        uvb = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVB_DATA)
-        uvcomp1 = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP1_DATA)
-        uvcomp2 = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP2_DATA)
+        time.sleep(self.const_integration_times[self.integration_time] * (1.0 + self.active_force_margin) / 1000.0)
 
-        uVBcalc = uvb - self.uvb_c_coef * uvcomp1 - self.uvb_d_coef * uvcomp2
+        snapshot = self.read_snapshot()
 
-        uVIB = uVBcalc * self.k2 * self.uvb_resp
+        self.config(
+            self.integration_time,
+            self.dynamic_setting,
+            Trigger.NoActiveForceTrigger,
+            ActiveForceMode.ActiveForceMode,
+            PowerMode.ShutDown)
 
-        return float(uVIB)
+        return snapshot
 
-    def calculate_average_uv_index(self):
-        """Calculates the Average UV Index."""
-        #Formula:
-        #UVAcomp = (UVA - UVD) - a * (UVcomp1 - UVD) - b * (UVcomp2 - UVD)
-        #UVBcomp = (UVB - UVD) - c * (UVcomp1 - UVD) - d * (UVcomp2 - UVD)
-        #UVI = ((UVBcomp * UVBresp) + (UVAcomp * UVAresp)) / 2
+    def sample_forced(self, interval, count = None):
+        """Yields one active force measurement per interval, keeping the sensor shut down between measurements.
+        Measurements run back to back if the interval is shorter than the integration time.
+        :param interval: Time between measurements in seconds.
+        :param count: Number of samples. None to sample until the generator is closed.
+        """
+        if interval <= 0:
+            raise ValueError("Interval must be greater than zero.")
 
-        uva = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVA_DATA)
-        uvb = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVB_DATA)
-        uvd = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_DUMMY)
-        uvcomp1 = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP1_DATA)
-        uvcomp2 = self._read_2bytes_as_ushort_lsbfirst(self.VEML6075_UVCOMP2_DATA)
+        sample = 0
+        schedule = Turta_Scheduling.FixedRateSchedule(interval)
 
-        uVAcomp = (uva - uvd) - self.uva_a_coef * (uvcomp1 - uvd) - self.uva_b_coef * (uvcomp2 - uvd)
-        uVBcomp = (uvb - uvd) - self.uvb_c_coef * (uvcomp1 - uvd) - self.uvb_d_coef * (uvcomp2 - uvd)
-        uVI = ((uVBcomp * self.uvb_resp) + (uVAcomp * self.uva_resp)) / 2
+        while count is None or sample < count:
+            yield self.read_forced_snapshot()
+            sample += 1
+            time.sleep(schedule.advance())
 
-        if uVI < 0:
-            uVI = 0
+    #Auto Ranging
 
-        return float(uVI)
+    def _select_range(self, snapshot):
+        """Returns the auto range step for the raw counts of a snapshot, or None to keep the range in use.
+        :param snapshot: UV snapshot taken with the range in use.
+        """
+        maxCount = max(snapshot.uva, snapshot.uvb, snapshot.uvcomp1, snapshot.uvcomp2)
+        sensitivity = self._get_sensitivity(self.integration_time, self.dynamic_setting)
+        steps = [ (self._get_sensitivity(it, ds), it, ds) for it, ds in self.const_auto_ranges ]
+
+        #Close to saturation, step to the next less sensitive range.
+        if maxCount >= self.auto_range_high_level * self.full_scale:
+            lower = [ step for step in steps if step[0] < sensitivity ]
+            return lower[-1][1:] if lower else None
+
+        #Step to the next more sensitive range if the expected count stays low.
+        higher = [ step for step in steps if step[0] > sensitivity ]
+        if higher and maxCount * higher[0][0] / sensitivity < self.auto_range_low_level * self.full_scale:
+            return higher[0][1:]
+
+        return None
+
+    def read_auto_ranged_snapshot(self, forced = True):
+        """Reads a UV snapshot, stepping the integration time and dynamic setting until the raw counts are in range.
+        The shortest integration time that keeps the counts in range is used, which also shortens the latency in bright light.
+        The next reading starts from the range selected by this one.
+        :param forced: True to use active force measurements, False for continuous mode.
+        """
+        snapshot = self.read_forced_snapshot() if forced else self.read_snapshot()
+
+        for i in range(len(self.const_auto_ranges)):
+            step = self._select_range(snapshot)
+            if step is None:
+                break
+
+            if forced:
+                self.config(step[0], step[1], Trigger.NoActiveForceTrigger, ActiveForceMode.ActiveForceMode, PowerMode.ShutDown)
+                snapshot = self.read_forced_snapshot()
+            else:
+                #Data in progress uses the previous range, wait for two integrations.
+                self.config(step[0], step[1], Trigger.NoActiveForceTrigger, ActiveForceMode.NormalMode, PowerMode.PowerOn)
+                time.sleep(2.0 * self.const_integration_times[step[0]] * (1.0 + self.active_force_margin) / 1000.0)
+                snapshot = self.read_snapshot()
+
+        return snapshot
 
     #Disposal
     def __del__(self):
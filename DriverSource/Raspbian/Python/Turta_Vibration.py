@@ -0,0 +1,137 @@
+# Turta IoT HAT Helper for Raspbian
+# Distributed under the terms of the MIT license.
+
+# Python Vibration Analysis for NXP MMA8491Q 3-Axis Accelerometer
+# Version 1.00
+# Updated: October 18th, 2026
+
+# Visit https://docs.turta.io for documentation.
+
+# Extracts windowed vibration features from raw 14-bit X, Y and Z-axis samples with NumPy.
+# Samples are the interleaved XYZ arrays of SampleRingBuffer blocks, or any array of raw
+# values.
+
+from collections import namedtuple
+import numpy as np
+
+#Results
+
+VibrationFeatures = namedtuple("VibrationFeatures", [ "timestamp", "rms", "peak", "crest_factor", "dominant_frequency" ])
+
+#Conversion
+
+def raw_to_g(raw, out = None):
+    """Converts raw 14-bit sensor values to G values in bulk, same as MMA8491QSensor.
+    Returns an array with the shape of the input. Interleaved XYZ input can be reshaped to (-1, 3).
+    :param raw: Raw sensor values. An array, a memoryview or a list.
+    :param out: Float array to write the results to. None to allocate a new one.
+    """
+    raw = np.asarray(raw)
+
+    if out is None:
+        out = np.empty(raw.shape, dtype = np.float64)
+
+    #Values with bit 13 set are zero or negative G.
+    np.subtract(raw, np.where(raw & 0x2000, 0x3FFF, 0), out = out)
+    np.divide(out, 1024.0, out = out)
+
+    return out
+
+#Feature Extraction
+
+class VibrationAnalyzer:
+    """Vibration Feature Analyzer
+    Collects raw XYZ samples into overlapping windows and calculates per axis RMS, peak, crest factor and dominant frequency.
+    RMS and peak are calculated after removing the window mean, so gravity and offsets do not count as vibration.
+    Window buffers are allocated once and reused for every window."""
+
+    def __init__(self, sample_rate, window_size = 256, overlap = 0.5):
+        """Initiates the analyzer.
+        :param sample_rate: Sample rate in Hz.
+        :param window_size: Samples per window.
+        :param overlap: Shared part of consecutive windows, from 0 up to but not including 1.
+        """
+        if window_size < 2:
+            raise ValueError("Window size must be at least two samples.")
+        if not 0.0 <= overlap < 1.0:
+            raise ValueError("Overlap must be from 0 up to but not including 1.")
+
+        self.sample_rate = float(sample_rate)
+        self.window_size = window_size
+        self.hop_size = max(1, int(round(window_size * (1.0 - overlap))))
+
+        #Window buffers
+        self._samples = np.zeros((window_size, 3), dtype = np.float64)
+        self._timestamps = np.zeros(window_size, dtype = np.int64)
+        self._centered = np.empty((window_size, 3), dtype = np.float64)
+        self._scratch = np.empty((window_size, 3), dtype = np.float64)
+        self._fill = 0
+
+        #Spectrum buffers
+        self._hann = np.hanning(window_size)[:, np.newaxis]
+        self._frequencies = np.fft.rfftfreq(window_size, 1.0 / self.sample_rate)
+        self._magnitudes = np.empty((window_size // 2 + 1, 3), dtype = np.float64)
+
+    def reset(self):
+        """Discards the samples of the incomplete window."""
+        self._fill = 0
+
+    def process(self, xyz, timestamps = None):
+        """Adds raw samples and returns the features of every window completed by them.
+        :param xyz: Interleaved raw X, Y and Z-axis values.
+        :param timestamps: Sample times in ns, one per XYZ sample. None if not available.
+        """
+        xyz = np.asarray(xyz).reshape(-1, 3)
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps)
+
+        results = []
+        position = 0
+
+        while position < len(xyz):
+            count = min(len(xyz) - position, self.window_size - self._fill)
+            target = slice(self._fill, self._fill + count)
+
+            raw_to_g(xyz[position:position + count], out = self._samples[target])
+            if timestamps is not None:
+                self._timestamps[target] = timestamps[position:position + count]
+
+            self._fill += count
+            position += count
+
+            if self._fill == self.window_size:
+                results.append(self._calculate_features())
+
+                #Keep the overlapping part as the start of the next window.
+                keep = self.window_size - self.hop_size
+                self._samples[:keep] = self._samples[self.hop_size:]
+                self._timestamps[:keep] = self._timestamps[self.hop_size:]
+                self._fill = keep
+
+        return results
+
+    def process_blocks(self, blocks):
+        """Adds the sample blocks of a SampleReader and returns the features of every completed window.
+        :param blocks: Sample blocks.
+        """
+        results = []
+        for block in blocks:
+            results += self.process(block.xyz, block.timestamps)
+
+        return results
+
+    def _calculate_features(self):
+        """Calculates the features of the full window."""
+        #Time domain
+        np.subtract(self._samples, self._samples.mean(axis = 0), out = self._centered)
+        np.multiply(self._centered, self._centered, out = self._scratch)
+        rms = np.sqrt(self._scratch.mean(axis = 0))
+        peak = np.abs(self._centered).max(axis = 0)
+        crestFactor = np.divide(peak, rms, out = np.zeros(3), where = rms > 0.0)
+
+        #Frequency domain, ignoring the DC bin.
+        np.multiply(self._centered, self._hann, out = self._scratch)
+        np.abs(np.fft.rfft(self._scratch, axis = 0), out = self._magnitudes)
+        dominantFrequency = self._frequencies[1 + np.argmax(self._magnitudes[1:], axis = 0)]
+
+        return VibrationFeatures(int(self._timestamps[-1]), rms, peak, crestFactor, dominantFrequency)
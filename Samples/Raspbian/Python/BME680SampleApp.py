@@ -14,7 +14,8 @@ bme680 = Turta_BME680.BME680Sensor()
 try:
     while True:
         #Hint: To get temperature, pressure and humidity readings at the same time,
-        #call BME680Sensor.read_tph() method.
+        #call BME680Sensor.read_tph() method. To get them with gas resistance
+        #from a single measurement cycle, call BME680Sensor.read_all() method.
 
         #Read & print temperature
         print("Temperature.....: " + str(round(bme680.read_temperature(), 1)) + "C")
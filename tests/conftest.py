@@ -0,0 +1,28 @@
+import os
+import sys
+import types
+
+#Load the drivers as the turta_iothat package from the source tree.
+DRIVER_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "DriverSource", "Raspbian", "Python")
+
+if "turta_iothat" not in sys.modules:
+    package = types.ModuleType("turta_iothat")
+    package.__path__ = [ os.path.abspath(DRIVER_PATH) ]
+    sys.modules["turta_iothat"] = package
+
+#Tests do not touch the bus or the GPIO pins, so they also run off the Raspberry Pi.
+try:
+    import smbus
+except ImportError:
+    smbus = types.ModuleType("smbus")
+    smbus.SMBus = None
+    sys.modules["smbus"] = smbus
+
+try:
+    import RPi.GPIO
+except ImportError:
+    rpi = types.ModuleType("RPi")
+    rpi.GPIO = types.ModuleType("RPi.GPIO")
+    rpi.__path__ = []
+    sys.modules["RPi"] = rpi
+    sys.modules["RPi.GPIO"] = rpi.GPIO
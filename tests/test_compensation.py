@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from turta_iothat import Turta_BME280, Turta_BME680
+
+#Integer and floating point compensation of the same ADC values must agree within these limits.
+#The fixed point formulas round to 0.01 degC and 1 Ohm, and the 32-bit BME680 pressure formula is coarser than the 64-bit BME280 one.
+BME280_LIMITS = { "temperature": 0.01, "pressure": 0.6, "humidity": 0.01 }
+BME680_LIMITS = { "temperature": 0.01, "pressure": 12.0, "humidity": 0.06, "gas_resistance": 1.0 }
+
+#Calibration of sample sensors
+BME280_CALIBRATION = Turta_BME280.BME280Calibration(
+    27504, 26435, -1000,
+    36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000,
+    75, 362, 0, 313, 50, 30)
+
+BME680_CALIBRATION = Turta_BME680.BME680Calibration(
+    26086, 26328, 3,
+    36468, -10426, 88, 7110, -124, 30, 35, -3426, -2624, 30,
+    802, 1010, 0, 45, 20, 120, -100,
+    -30, -8766, 18,
+    1, 45, 0)
+
+#ADC values from -40 to 85 degC, 300 to 1100 hPa and 0 to 100 %RH, with the range ends.
+TEMPERATURE_ADC = [ 310000, 600000 ]
+PRESSURE_ADC = [ 250000, 560000 ]
+HUMIDITY_ADC = [ 0, 65535 ]
+
+class NullBus:
+    """Bus for sensors created without hardware."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def write_i2c_block_data(self, *args):
+        pass
+
+    def read_i2c_block_data(self, address, reg_addr, length):
+        return [ 0 ] * length
+
+def create_sensor(sensor_class, calibration):
+    sensor = sensor_class.__new__(sensor_class)
+    sensor.bus = NullBus()
+    sensor.calibration = calibration
+    return sensor
+
+def sweep_adc(count = 5000, seed = 1):
+    rng = random.Random(seed)
+    samples = [ (t, p, h) for t in TEMPERATURE_ADC for p in PRESSURE_ADC for h in HUMIDITY_ADC ]
+    samples += [ (rng.randint(*TEMPERATURE_ADC), rng.randint(*PRESSURE_ADC), rng.randint(*HUMIDITY_ADC)) for i in range(count) ]
+    return samples
+
+def compensate(sensor, mode, tempADC, presADC, humADC):
+    sensor.compensation_mode = mode
+    temperature = sensor._compensate_temperature(tempADC)
+    return temperature, sensor._compensate_pressure(presADC), sensor._compensate_humidity(humADC)
+
+@pytest.mark.parametrize("sensor_class, calibration, compensation_mode, limits", [
+    (Turta_BME280.BME280Sensor, BME280_CALIBRATION, Turta_BME280.CompensationMode, BME280_LIMITS),
+    (Turta_BME680.BME680Sensor, BME680_CALIBRATION, Turta_BME680.CompensationMode, BME680_LIMITS) ])
+def test_integer_tph_matches_float(sensor_class, calibration, compensation_mode, limits):
+    sensor = create_sensor(sensor_class, calibration)
+    maxDelta = [ 0.0, 0.0, 0.0 ]
+
+    for tempADC, presADC, humADC in sweep_adc():
+        floatResults = compensate(sensor, compensation_mode.Float, tempADC, presADC, humADC)
+        intResults = compensate(sensor, compensation_mode.Integer, tempADC, presADC, humADC)
+        for i in range(3):
+            maxDelta[i] = max(maxDelta[i], abs(intResults[i] - floatResults[i]))
+
+    assert maxDelta[0] < limits["temperature"]
+    assert maxDelta[1] < limits["pressure"]
+    assert maxDelta[2] < limits["humidity"]
+
+def test_integer_gas_resistance_matches_float():
+    sensor = create_sensor(Turta_BME680.BME680Sensor, BME680_CALIBRATION)
+
+    for gasRange in range(16):
+        for gasResADC in range(1024):
+            sensor.compensation_mode = Turta_BME680.CompensationMode.Float
+            floatResistance = sensor._calculate_gas_resistance(gasResADC, gasRange)
+            sensor.compensation_mode = Turta_BME680.CompensationMode.Integer
+            intResistance = sensor._calculate_gas_resistance(gasResADC, gasRange)
+
+            assert abs(intResistance - floatResistance) <= BME680_LIMITS["gas_resistance"]
+
+@pytest.mark.parametrize("sensor_class, calibration, compensation_mode, batch_function", [
+    (Turta_BME280.BME280Sensor, BME280_CALIBRATION, Turta_BME280.CompensationMode, "bme280_compensate"),
+    (Turta_BME680.BME680Sensor, BME680_CALIBRATION, Turta_BME680.CompensationMode, "bme680_compensate") ])
+def test_batch_tph_matches_scalar(sensor_class, calibration, compensation_mode, batch_function):
+    Turta_BatchCompensation = pytest.importorskip("turta_iothat.Turta_BatchCompensation")
+    sensor = create_sensor(sensor_class, calibration)
+    samples = sweep_adc(count = 1000)
+
+    tempADC, presADC, humADC = zip(*samples)
+    batchResults = getattr(Turta_BatchCompensation, batch_function)(calibration, tempADC, presADC, humADC)
+
+    for i, sample in enumerate(samples):
+        scalarResults = compensate(sensor, compensation_mode.Float, *sample)
+        for j in range(3):
+            assert batchResults[j][i] == pytest.approx(scalarResults[j], rel = 1e-12, abs = 1e-9)
+
+def test_batch_gas_resistance_matches_scalar():
+    Turta_BatchCompensation = pytest.importorskip("turta_iothat.Turta_BatchCompensation")
+    sensor = create_sensor(Turta_BME680.BME680Sensor, BME680_CALIBRATION)
+    sensor.compensation_mode = Turta_BME680.CompensationMode.Float
+
+    gasResADC = [ adc for gasRange in range(16) for adc in range(1024) ]
+    gasRanges = [ gasRange for gasRange in range(16) for adc in range(1024) ]
+    batchResistances = Turta_BatchCompensation.bme680_gas_resistance(BME680_CALIBRATION, gasResADC, gasRanges)
+
+    for i in range(len(gasResADC)):
+        assert batchResistances[i] == pytest.approx(sensor._calculate_gas_resistance(gasResADC[i], gasRanges[i]), rel = 1e-12)
@@ -0,0 +1,31 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from turta_iothat import Turta_LightConversion
+
+def test_single_reading():
+    lux, cct = Turta_LightConversion.calculate_lux_and_cct(1000, 400, 400, 300, 0, 100.0)
+
+    #IR is 50 counts, 100 ms at 1x gain gives 100 / 310 counts per lux.
+    assert isinstance(lux, float)
+    assert lux == pytest.approx((0.136 * 350 + 350 - 0.444 * 250) * 3.1)
+    assert cct == pytest.approx(3810.0 * 250 / 350 + 1391.0)
+
+def test_gain_and_glass_attenuation_scale_lux():
+    lux, cct = Turta_LightConversion.calculate_lux_and_cct(1000, 400, 400, 300, 0, 100.0)
+    luxGain, cctGain = Turta_LightConversion.calculate_lux_and_cct(1000, 400, 400, 300, 2, 100.0)
+    luxGlass, cctGlass = Turta_LightConversion.calculate_lux_and_cct(1000, 400, 400, 300, 0, 100.0, glass_attenuation = 0.5)
+
+    assert luxGain == pytest.approx(lux / 16.0)
+    assert luxGlass == pytest.approx(lux / 2.0)
+    assert cctGain == cctGlass == pytest.approx(cct)
+
+def test_arrays_and_invalid_readings():
+    #Valid, saturated clear channel and no red light.
+    lux, cct = Turta_LightConversion.calculate_lux_and_cct([ 1000, 37925, 600 ], [ 400, 400, 100 ], [ 400, 400, 400 ], [ 300, 300, 300 ], 0, 100.0)
+
+    assert lux.shape == cct.shape == (3,)
+    assert lux[0] == pytest.approx(888.46)
+    assert np.isnan(lux[1]) and np.isnan(cct[1])
+    assert not np.isnan(lux[2]) and np.isnan(cct[2])
@@ -0,0 +1,61 @@
+import pytest
+
+from turta_iothat.Turta_MMA8491Q import SampleRingBuffer, ShockCapture
+
+SAMPLE_PERIOD = 10000000 #10 ms in ns
+
+def append_samples(buffer, count, x = 0, y = 0, z = 1024):
+    """Appends samples at the sample period, continuing from the last one."""
+    for i in range(count):
+        buffer.append(buffer.write_count * SAMPLE_PERIOD, x, y, z)
+
+def test_reader_follows_writer_across_the_wrap():
+    buffer = SampleRingBuffer(8)
+    reader = buffer.create_reader()
+    append_samples(buffer, 6)
+    assert [ len(block.timestamps) for block in reader.read() ] == [ 6 ]
+
+    #Five more samples wrap around the end of the buffer.
+    for i in range(5):
+        buffer.append(0, i, i, i)
+    assert reader.available() == 5
+
+    blocks = reader.read()
+    assert [ (block.index, len(block.timestamps)) for block in blocks ] == [ (6, 2), (8, 3) ]
+    assert [ value for block in blocks for value in block.xyz[::3] ] == [ 0, 1, 2, 3, 4 ]
+    assert reader.dropped == 0
+
+def test_reader_counts_dropped_samples():
+    buffer = SampleRingBuffer(8)
+    reader = buffer.create_reader()
+    append_samples(buffer, 20)
+
+    blocks = reader.read(max_samples = 5)
+    assert reader.dropped == 12
+    assert blocks[0].index == 12
+    assert sum(len(block.timestamps) for block in blocks) == 5
+    assert reader.available() == 3
+
+def test_shock_capture_window():
+    buffer = SampleRingBuffer(256)
+    append_samples(buffer, 30)
+    capture = ShockCapture(buffer, threshold = 2.0, pre_trigger_time = 0.1, post_trigger_time = 0.2)
+
+    append_samples(buffer, 20)
+    append_samples(buffer, 1, x = 3000)
+    triggerTime = (buffer.write_count - 1) * SAMPLE_PERIOD
+    append_samples(buffer, 10)
+    assert capture.update() == []
+
+    append_samples(buffer, 20)
+    events = capture.update()
+
+    #10 samples before the trigger, the trigger and 20 samples after it.
+    assert len(events) == 1
+    assert events[0].timestamp == triggerTime
+    assert events[0].peak == pytest.approx((3000 ** 2 + 1024 ** 2) ** 0.5 / 1024.0)
+    assert len(events[0].timestamps) == 31
+    assert events[0].timestamps[0] == triggerTime - 100000000
+    assert events[0].timestamps[-1] == triggerTime + 200000000
+    assert len(events[0].xyz) == 31 * 3
+    assert events[0].xyz[30] == 3000
@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from turta_iothat.Turta_Scheduling import FixedRateSchedule, PeriodicWorker
+
+def test_schedule_skips_missed_deadlines():
+    schedule = FixedRateSchedule(0.01)
+    time.sleep(0.035)
+
+    #At least the first deadline and the two after it are past.
+    wait = schedule.advance()
+    assert schedule.overruns >= 3
+    assert 0.0 <= wait <= 0.01
+
+def test_schedule_rejects_non_positive_period():
+    with pytest.raises(ValueError):
+        FixedRateSchedule(0)
+
+def test_worker_raises_error_once():
+    calls = []
+
+    def task():
+        calls.append(time.monotonic())
+        if len(calls) == 3:
+            raise OSError("Read failed.")
+
+    worker = PeriodicWorker(task, 0.001)
+    worker.start()
+
+    deadline = time.monotonic() + 2.0
+    while worker.running and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    with pytest.raises(OSError):
+        worker.is_running()
+    assert worker.is_running() is False
+    assert len(calls) == 3
+
+def test_worker_stops():
+    worker = PeriodicWorker(lambda: None, 0.001)
+    worker.start()
+    assert worker.is_running()
+
+    worker.stop()
+    assert not worker.is_running()
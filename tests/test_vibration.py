@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from turta_iothat import Turta_Vibration
+
+SAMPLE_RATE = 400.0
+WINDOW_SIZE = 256
+
+def encode_g(values):
+    """Encodes G values as raw 14-bit sensor values."""
+    counts = np.round(np.asarray(values) * 1024.0).astype(np.int64)
+    return np.where(counts < 0, counts + 0x3FFF, counts)
+
+def test_raw_to_g_matches_sensor_scale():
+    assert list(Turta_Vibration.raw_to_g([ 0, 1024, 0x3FFF - 1024, 0x1FFF ])) == [ 0.0, 1.0, -1.0, 0x1FFF / 1024.0 ]
+
+def test_sine_gives_rms_and_dominant_frequency():
+    #50 Hz, 0.5G sine on the X-axis, gravity on the Z-axis.
+    t = np.arange(WINDOW_SIZE) / SAMPLE_RATE
+    xyz = np.empty((WINDOW_SIZE, 3), dtype = np.int64)
+    xyz[:, 0] = encode_g(0.5 * np.sin(2.0 * math.pi * 50.0 * t))
+    xyz[:, 1] = 0
+    xyz[:, 2] = encode_g(np.ones(WINDOW_SIZE))
+    timestamps = (t * 1e9).astype(np.int64)
+
+    analyzer = Turta_Vibration.VibrationAnalyzer(SAMPLE_RATE, window_size = WINDOW_SIZE)
+    features = analyzer.process(xyz.ravel(), timestamps)
+
+    assert len(features) == 1
+    assert features[0].timestamp == timestamps[-1]
+    assert features[0].rms[0] == pytest.approx(0.5 / math.sqrt(2.0), rel = 1e-3)
+    assert features[0].peak[0] == pytest.approx(0.5, abs = 1.0 / 1024.0)
+    assert features[0].crest_factor[0] == pytest.approx(math.sqrt(2.0), rel = 5e-3)
+    assert features[0].dominant_frequency[0] == pytest.approx(50.0)
+
+    #Gravity is not vibration.
+    assert features[0].rms[1] == 0.0
+    assert features[0].rms[2] == 0.0
+
+def test_windows_overlap():
+    analyzer = Turta_Vibration.VibrationAnalyzer(SAMPLE_RATE, window_size = WINDOW_SIZE, overlap = 0.5)
+    xyz = np.zeros(WINDOW_SIZE * 2 * 3, dtype = np.int64)
+
+    assert len(analyzer.process(xyz[:WINDOW_SIZE * 3 - 3])) == 0
+    assert len(analyzer.process(xyz[WINDOW_SIZE * 3 - 3:])) == 3